@@ -2,10 +2,8 @@ import argparse
 import sys
 import os
 import logging
-import yaml # Added for config file loading
 
-from .utils import log, parse_size # Import necessary utils
-from .splitters import CountSplitter, SizeSplitter, KeySplitter # Import splitter classes
+from .utils import log, parse_size, is_jsonl_input, default_filename_format # Import necessary utils
 
 # --- Helper Functions for Interactive Mode ---
 
@@ -166,6 +164,7 @@ def run_interactive_mode():
     args.max_size = None
     args.on_missing_key = 'group'
     args.on_invalid_item = 'warn'
+    args.max_open_files = None # Not prompted; the splitter picks a safe default
     args.verbose = False
     args.filename_format = None # Will be set later based on split_by
     args.report_interval = 10000 # Add default for interactive
@@ -233,7 +232,7 @@ def run_interactive_mode():
                  )
 
             # Set default format based on split type *before* prompting
-            default_ff = "{base_name}_key_{index}{part}.{ext}" if args.split_by == 'key' else "{base_name}_{type}_{index:04d}{part}.{ext}"
+            default_ff = default_filename_format(args.split_by)
             ff_prompt = "🏷️ Output filename format?"
             args.filename_format = _prompt_with_validation(ff_prompt, default=default_ff, required=False)
 
@@ -250,7 +249,7 @@ def run_interactive_mode():
             if args.report_interval is None: args.report_interval = 0 # Treat None as 0 (disabled)
         else:
             # Ensure filename_format gets a default even if optionals skipped
-            args.filename_format = "{base_name}_key_{index}{part}.{ext}" if args.split_by == 'key' else "{base_name}_{type}_{index:04d}{part}.{ext}"
+            args.filename_format = default_filename_format(args.split_by)
 
         # --- Configuration Summary and Confirmation ---
         print("\n" + "="*40)
@@ -308,6 +307,10 @@ def execute_split(args):
         log.error(f"Input file not readable: {args.input_file}")
         return False
 
+    # Imported here rather than at module level: the splitters pull in ijson (and orjson),
+    # which --help, argument errors and the interactive prompts never need
+    from .splitters import CountSplitter, SizeSplitter, KeySplitter
+
     # --- Prepare Splitter Arguments --- # Note: Some validation now in splitter __init__
     splitter_kwargs = {
         'input_file': args.input_file,
@@ -339,7 +342,8 @@ def execute_split(args):
             # Pass key-specific args
             splitter_kwargs.update({
                 'on_missing_key': args.on_missing_key,
-                'on_invalid_item': args.on_invalid_item
+                'on_invalid_item': args.on_invalid_item,
+                'max_open_files': args.max_open_files
             })
             splitter = KeySplitter(key_name=args.value, **splitter_kwargs)
 
@@ -372,10 +376,12 @@ def execute_split(args):
         files_to_check = splitter.created_files_set if splitter else created_files
         for filename in files_to_check:
             try:
-                if os.path.exists(filename):
-                    os.remove(filename)
-                    log.debug(f"  Removed potentially partial file: {filename}")
-                    cleaned_count += 1
+                # Remove directly (one syscall) and treat an absent file as already clean
+                os.remove(filename)
+                log.debug(f"  Removed potentially partial file: {filename}")
+                cleaned_count += 1
+            except FileNotFoundError:
+                pass
             except OSError as rm_err:
                 log.warning(f"  Could not remove partial file '{filename}': {rm_err}")
             except Exception as E:
@@ -446,6 +452,9 @@ def main():
                            help="Action for items missing the key (default: group into '__missing_key__' file).")
     key_group.add_argument("--on-invalid-item", choices=['warn', 'skip', 'error'], default='warn',
                             help="Action for items at path not being objects (default: warn and skip).")
+    key_group.add_argument("--max-open-files", type=int, default=None,
+                           help="Max output files kept open at once; the least recently used is closed\n"
+                                "and reopened when needed (default: 1000, or half the open-file limit if lower).")
 
     # --- Load Config File (if provided) and Set Defaults --- #
     # Parse only the --config argument first to load defaults
@@ -455,6 +464,7 @@ def main():
 
     config_values = {}
     if config_args.config:
+        import yaml # Only needed when a config file is given
         log.info(f"Loading configuration from: {config_args.config}")
         try:
             with open(config_args.config, 'r') as f:
@@ -500,7 +510,9 @@ def main():
 
         # Re-check core args presence in case called programmatically without full CLI args
         # but also not in interactive mode (e.g., tests missing args)
-        is_missing_core_cli = not (args.input_file and args.split_by and args.value and args.path)
+        # JSON Lines input has one item per line, so it needs no --path
+        path_required = not (args.input_file and is_jsonl_input(args.input_file))
+        is_missing_core_cli = not (args.input_file and args.split_by and args.value and (args.path or not path_required))
         if is_missing_core_cli and not run_interactive:
              # If not interactive and missing core args, it's an error
              # Construct the message manually as argparse might not have been triggered with full checks
@@ -509,7 +521,7 @@ def main():
              # if not args.output_prefix: missing_required.append('output_prefix') # Removed
              if not args.split_by: missing_required.append('--split-by')
              if not args.value: missing_required.append('--value')
-             if not args.path: missing_required.append('--path')
+             if not args.path and path_required: missing_required.append('--path')
              parser.error(f"the following arguments are required in non-interactive mode: {', '.join(missing_required)}")
 
         # CLI Mode: argparse handles missing required args automatically by exiting.
@@ -528,8 +540,7 @@ def main():
 
         # Set default filename format if not provided by user
         if args.filename_format is None:
-             # Use {base_name} instead of {prefix}
-             args.filename_format = "{base_name}_key_{index}{part}.{ext}" if args.split_by == 'key' else "{base_name}_{type}_{index:04d}{part}.{ext}"
+             args.filename_format = default_filename_format(args.split_by)
 
         final_args = args
 
@@ -2,11 +2,231 @@ import json
 import ijson
 import os
 import logging
-from cachetools import LRUCache
+import functools
+import math
+import importlib
+import mmap
+import queue
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+try:
+    import orjson # Optional: much faster serialization, returns bytes directly
+except ImportError:
+    orjson = None
+try:
+    import resource # POSIX only; used to respect the process file descriptor limit
+except ImportError:
+    resource = None
+
+from .utils import log, parse_size, sanitize_filename, compile_filename_format, default_filename_format, DEFAULT_CHUNK_FILENAME_FORMAT, DEFAULT_KEY_FILENAME_FORMAT, is_jsonl_input, PROGRESS_REPORT_INTERVAL, ProgressTracker
+
+MAX_OPEN_FILES_KEY_SPLIT = 1000 # Max files to keep open during key splitting (further capped by RLIMIT_NOFILE)
+KEY_WRITE_BUFFER_SIZE = 256 * 1024 # Bytes buffered per key before writing to its file
+KEY_WRITE_BUFFER_TOTAL = 16 * 1024 * 1024 # Bytes buffered across all keys before the largest buffers are written
+# Bytes added around items by _write_chunk: "[\n" ... "\n]\n" and ",\n" per JSON array item, "\n" per JSONL line
+JSON_ARRAY_OVERHEAD = 5
+JSON_ITEM_OVERHEAD = 2
+JSONL_ITEM_OVERHEAD = 1
+INPUT_READ_BUFFER_SIZE = 1024 * 1024 # Bytes ijson reads from the input per call (its default is 64 KiB)
+CHUNK_WRITE_QUEUE_SIZE = 2 # Finished count/size chunks that may wait for the writer thread
+MAX_UNIQUE_KEYS_WARN_THRESHOLD = 10000 # Warn once when key splitting sees this many distinct values
+SANITIZED_KEY_CACHE_SIZE = 100000 # String key values whose sanitized form key splitting remembers
+# Flags for raw output files (O_BINARY only exists, and matters, on Windows)
+KEY_FILE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+CHUNK_FILE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def _select_ijson_backend():
+    """Returns the fastest ijson backend that can be loaded.
+
+    Recent ijson releases already prefer the C backend, but older releases and
+    installs without the bundled yajl extension fall back to the pure-Python
+    parser, which is several times slower.
+    """
+    for backend_name in ('yajl2_c', 'yajl2_cffi', 'yajl2'):
+        try:
+            return importlib.import_module(f"ijson.backends.{backend_name}")
+        except ImportError:
+            continue
+    return ijson
+
+
+_ijson_backend = _select_ijson_backend()
+IJSON_BACKEND_NAME = getattr(_ijson_backend, 'backend_name', None) or getattr(_ijson_backend, 'backend', 'python')
+
+
+def _json_default(obj):
+    """Serializes values the JSON encoders do not handle natively.
+
+    ijson yields non-integer numbers as Decimal; write them back out as floats.
+    Numbers outside the float range, too large (inf) or too small (a non-zero
+    value that becomes 0.0), raise TypeError, so the item is reported and
+    skipped instead of being written with the value replaced.
+    """
+    if isinstance(obj, Decimal):
+        value = float(obj)
+        if not math.isfinite(value) or (value == 0.0 and obj != 0):
+            raise TypeError(f"Number {obj} is outside the range of a JSON float")
+        return value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Compact UTF-8 encoding of a single item (no whitespace, non-ASCII kept as-is).
+# Raises TypeError on unsupported values.
+_item_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_json_default)
 
-from .utils import log, parse_size, sanitize_filename, PROGRESS_REPORT_INTERVAL, ProgressTracker
+def _dumps_bytes_json(obj):
+    return _item_encoder.encode(obj).encode('utf-8')
 
-MAX_OPEN_FILES_KEY_SPLIT = 1000 # Max files to keep open during key splitting
+if orjson is not None:
+    _orjson_dumps = functools.partial(orjson.dumps, default=_json_default)
+
+    def _dumps_bytes(obj):
+        try:
+            return _orjson_dumps(obj)
+        except TypeError:
+            # orjson rejects integers wider than 64 bits, which the json module
+            # writes as they are; values neither can encode still raise TypeError
+            return _dumps_bytes_json(obj)
+else:
+    _dumps_bytes = _dumps_bytes_json
+
+
+def _write_all(fd, data):
+    """Writes all of data to a raw file descriptor, retrying on short writes."""
+    written = os.write(fd, data)
+    while written < len(data):
+        written += os.write(fd, data[written:])
+
+
+def _write_all_parts(fd, parts):
+    """Writes a few buffers back to back, with a single writev call where the OS provides it."""
+    if hasattr(os, 'writev'):
+        written = os.writev(fd, parts)
+        if written == sum(len(part) for part in parts):
+            return
+        # Short write (rare for regular files): finish the remainder piece by piece
+        for part in parts:
+            if written >= len(part):
+                written -= len(part)
+                continue
+            _write_all(fd, memoryview(part)[written:])
+            written = 0
+    else:
+        for part in parts:
+            _write_all(fd, part)
+
+
+def _default_max_open_files(limit=None):
+    """Returns how many output files key splitting may hold open at once.
+
+    Uses `limit` (MAX_OPEN_FILES_KEY_SPLIT if None), capped at half of the soft
+    RLIMIT_NOFILE so the input file, logging and the interpreter itself always
+    have descriptors left.
+    """
+    max_open = MAX_OPEN_FILES_KEY_SPLIT if limit is None else limit
+    if resource is not None:
+        try:
+            soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        except (ValueError, OSError):
+            soft_limit = resource.RLIM_INFINITY
+        if soft_limit != resource.RLIM_INFINITY:
+            max_open = min(max_open, soft_limit // 2)
+    return max(1, max_open)
+
+
+class _ChunkWriterThread:
+    """Runs a chunk writing function on a background thread, fed through a bounded queue.
+
+    Parsing and encoding carry on while earlier chunks are written; the queue bound
+    keeps at most `max_pending` finished chunks in memory. The write function must
+    return None on failure (as _write_chunk does); failures are counted.
+    """
+
+    def __init__(self, write_func, max_pending=CHUNK_WRITE_QUEUE_SIZE):
+        self._write_func = write_func
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self.failed_writes = 0
+        self._thread = threading.Thread(target=self._run, name="chunk-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            args, kwargs = job
+            try:
+                if self._write_func(*args, **kwargs) is None:
+                    self.failed_writes += 1
+            except Exception:
+                log.exception("Unexpected error writing chunk:")
+                self.failed_writes += 1
+
+    def submit(self, *args, **kwargs):
+        """Queues a write, blocking while `max_pending` chunks are already waiting."""
+        self._queue.put((args, kwargs))
+
+    def close(self):
+        """Waits for all queued writes to finish. Returns the number of failed writes."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        return self.failed_writes
+
+
+class HandlePool:
+    """Bounded pool of raw output file descriptors, keyed by file path.
+
+    Keeps at most `max_open` descriptors open. Adding one more closes the least
+    recently used descriptor; the caller simply reopens that path (in append mode)
+    the next time it has data for it, so key cardinality is not limited by the OS.
+    """
+
+    def __init__(self, max_open):
+        self.max_open = max_open
+        self._fds = OrderedDict()
+
+    def __len__(self):
+        return len(self._fds)
+
+    def get(self, path):
+        """Returns the open descriptor for path (marking it most recently used), or None."""
+        fd = self._fds.get(path)
+        if fd is not None:
+            self._fds.move_to_end(path)
+        return fd
+
+    def add(self, path, fd):
+        """Registers a newly opened descriptor, closing the least recently used one if the pool is full."""
+        self._fds[path] = fd
+        if len(self._fds) > self.max_open:
+            _, old_fd = self._fds.popitem(last=False)
+            os.close(old_fd)
+
+    def close(self, path):
+        """Closes and forgets the descriptor for path. Returns True if one was open."""
+        fd = self._fds.pop(path, None)
+        if fd is None:
+            return False
+        os.close(fd)
+        return True
+
+    def close_all(self, log=None):
+        """Closes every pooled descriptor. Returns the number closed successfully."""
+        closed_count = 0
+        while self._fds:
+            path, fd = self._fds.popitem(last=False)
+            try:
+                os.close(fd)
+                closed_count += 1
+            except OSError as e:
+                if log is not None:
+                    log.warning(f"Error closing file '{path}': {e}")
+        return closed_count
 
 class SplitterBase:
     """Base class for all splitting strategies."""
@@ -38,6 +258,8 @@ class SplitterBase:
                 raise # Re-raise to be caught by the caller
 
         self.filename_format = filename_format
+        self._filename_renderers = {} # (split_type, ext) -> (format, render), see _chunk_filename_renderer
+        self._output_dir_ready = False # Set once _ensure_output_dir has run
         self.verbose = verbose
         self.created_files_set = created_files_set if created_files_set is not None else set()
         self.log = log # Use the logger from utils
@@ -48,11 +270,32 @@ class SplitterBase:
             self.log.setLevel(logging.DEBUG)
         else:
             self.log.setLevel(logging.INFO)
+        self.log.debug(f"Using ijson backend: {IJSON_BACKEND_NAME}")
+
+        # JSON Lines input holds one item per line, so there is no array to point --path at
+        self.input_is_jsonl = is_jsonl_input(input_file)
+        if self.input_is_jsonl and self.path not in ('', 'item'):
+            self.log.warning(f"Input '{input_file}' is JSON Lines; each line is one item and --path '{self.path}' is ignored.")
 
     def split(self):
         """Template method for splitting. Must be implemented by subclasses."""
         raise NotImplementedError()
 
+    def _iter_input_items(self, f):
+        """Streams the items to split from an open binary input file."""
+        if self.input_is_jsonl:
+            return _ijson_backend.items(f, '', multiple_values=True, buf_size=INPUT_READ_BUFFER_SIZE)
+        return _ijson_backend.items(f, self.path, buf_size=INPUT_READ_BUFFER_SIZE)
+
+    def _finish_chunk_writes(self, writer, tracker):
+        """Waits for queued chunk writes and reports the outcome. Returns the split result."""
+        failed_writes = writer.close()
+        if failed_writes:
+            self.log.error(f"{failed_writes} output file(s) could not be written.")
+            return False
+        tracker.finalize()
+        return True
+
     def _progress_report(self, item_count_total, last_report):
         """Common progress reporting. [DEPRECATED - Use ProgressTracker]"""
         # This method is now deprecated in favor of the ProgressTracker class
@@ -63,15 +306,131 @@ class SplitterBase:
             return item_count_total
         return last_report
 
-    def _write_chunk(self, primary_index, chunk_data, part_index=None, split_type='chunk', key_value=None):
+    @property
+    def _item_separator(self):
+        """Bytes placed between encoded items: ",\n" inside a JSON array, a newline for JSONL."""
+        return b',\n' if self.output_format == 'json' else b'\n'
+
+    def _ensure_output_dir(self):
+        """Creates the output directory on the first write of the run; later writes skip the check."""
+        if not self._output_dir_ready:
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+            self._output_dir_ready = True
+
+    def _chunk_filename_renderer(self, split_type, extension):
+        """Returns (format string, render callable) for _write_chunk's file names.
+
+        The format is chosen and compiled with compile_filename_format once per
+        split type and extension, so writing a chunk only renders the index and part.
+        Raises ValueError (not cached) if the format does not compile.
+        """
+        cache_key = (split_type, extension)
+        cached = self._filename_renderers.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Determine the correct filename format string
+        current_format = self.filename_format
+        if not current_format: # Use default if None
+             current_format = default_filename_format(split_type)
+        # Handle potential mismatch if user didn't provide format and split_type is key
+        elif split_type == 'key' and '{index:04d}' in current_format:
+            self.log.debug("Defaulting key split filename format as provided format seems intended for count/size.")
+            current_format = DEFAULT_KEY_FILENAME_FORMAT
+        # Handle potential mismatch if user didn't provide format and split_type is chunk
+        elif split_type == 'chunk' and '{index}' in current_format and ':' not in current_format.split('{index}')[-1].split('}')[0]: # Check if index is used without formatting
+            self.log.debug("Defaulting chunk split filename format as provided format seems intended for key.")
+            current_format = DEFAULT_CHUNK_FILENAME_FORMAT
+        if split_type == 'key':
+            # Ensure the format string doesn't try to apply number formatting to the key string
+            current_format = current_format.replace("{index:04d}", "{index}") # Basic safeguard
+
+        render_basename = compile_filename_format(current_format, base_name=self.base_name, type=split_type, ext=extension)
+        self._filename_renderers[cache_key] = (current_format, render_basename)
+        return current_format, render_basename
+
+    def _split_jsonl_lines(self, records_per_file, write_chunk, tracker, max_bytes=None):
+        """Splits JSON Lines input into files without parsing it.
+
+        A file is closed before the line that would take it past records_per_file
+        lines or max_bytes bytes (either limit may be None); sizes count each line
+        plus its newline, as written. Lines are copied byte for byte, lines holding
+        only whitespace are dropped (as the parsing path drops them), and lines
+        are not validated as JSON.
+        """
+        item_count_total = 0
+        chunk_index = 0
+        with open(self.input_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                find = mm.find
+                end = len(mm)
+                pos = 0
+                # The chunk is built from runs of consecutive kept lines, so a
+                # file's lines are copied in one slice unless blank lines split them
+                chunk = bytearray()
+                chunk_items = 0
+                chunk_size = 0
+                run_start = None
+                run_end = 0
+                while pos < end:
+                    nl = find(b'\n', pos)
+                    if nl == -1:
+                        nl = end
+                    if nl == pos or mm[pos:nl].isspace():
+                        if run_start is not None: # A blank line ends the current run
+                            if chunk:
+                                chunk += b'\n'
+                            chunk += mm[run_start:run_end]
+                            run_start = None
+                        pos = nl + 1
+                        continue
+
+                    line_size = nl - pos + 1
+                    if chunk_items and (chunk_items == records_per_file or
+                                        (max_bytes and chunk_size + line_size > max_bytes)):
+                        if run_start is not None:
+                            if chunk:
+                                chunk += b'\n'
+                            chunk += mm[run_start:run_end]
+                            run_start = None
+                        write_chunk(chunk_index, chunk, part_index=None, split_type='chunk', item_count=chunk_items)
+                        chunk_index += 1
+                        chunk = bytearray() # The written buffer now belongs to the writer
+                        chunk_items = 0
+                        chunk_size = 0
+                    elif not chunk_items and max_bytes and line_size > max_bytes:
+                        self.log.warning(f"Item {item_count_total + 1} alone (size ~{line_size / (1024*1024):.2f} MB) may exceed the target chunk size of {max_bytes / (1024*1024):.2f} MB. Writing it to its own file.")
+
+                    if run_start is None:
+                        run_start = pos
+                    run_end = nl
+                    chunk_items += 1
+                    chunk_size += line_size
+                    item_count_total += 1
+                    tracker.update(item_count_total)
+                    pos = nl + 1
+
+                if chunk_items:
+                    if run_start is not None:
+                        if chunk:
+                            chunk += b'\n'
+                        chunk += mm[run_start:run_end]
+                    write_chunk(chunk_index, chunk, part_index=None, split_type='chunk', item_count=chunk_items)
+
+    def _write_chunk(self, primary_index, chunk_data, part_index=None, split_type='chunk', key_value=None, item_count=None):
         """Writes a chunk of data to a uniquely named file using the filename format.
 
         Args:
             primary_index (int or str): The primary index (chunk number or sanitized key).
-            chunk_data (list): The data to write.
+            chunk_data (bytes-like): The items to write, encoded with _dumps_bytes and joined
+                with self._item_separator.
             part_index (int, optional): The part index for secondary splits.
             split_type (str): 'chunk' for count/size, 'key' for key split.
             key_value (str, optional): The sanitized key value (used for 'key' split index).
+            item_count (int, optional): Number of items in chunk_data (for logging).
         """
         if not chunk_data:
             self.log.warning(f"Attempted to write empty chunk for index {primary_index}, part {part_index}. Skipping.")
@@ -83,36 +442,11 @@ class SplitterBase:
         # Use key_value for index if split_type is 'key', otherwise use primary_index (number)
         index_val = key_value if split_type == 'key' else primary_index
 
-        format_args = {
-            'base_name': self.base_name,
-            'type': split_type,
-            'index': index_val,
-            'part': part_suffix,
-            'ext': extension
-        }
-
-        # Determine the correct filename format string
-        current_format = self.filename_format
-        if not current_format: # Use default if None
-             current_format = "{base_name}_key_{index}{part}.{ext}" if split_type == 'key' else "{base_name}_{type}_{index:04d}{part}.{ext}"
-        # Handle potential mismatch if user didn't provide format and split_type is key
-        elif split_type == 'key' and '{index:04d}' in current_format:
-            self.log.debug("Defaulting key split filename format as provided format seems intended for count/size.")
-            current_format = "{base_name}_key_{index}{part}.{ext}"
-        # Handle potential mismatch if user didn't provide format and split_type is chunk
-        elif split_type == 'chunk' and '{index}' in current_format and ':' not in current_format.split('{index}')[-1].split('}')[0]: # Check if index is used without formatting
-            self.log.debug("Defaulting chunk split filename format as provided format seems intended for key.")
-            current_format = "{base_name}_{type}_{index:04d}{part}.{ext}"
-
+        current_format = self.filename_format or 'default'
         try:
-            # Apply formatting based on split type to get the basename
-            formatted_basename = ""
-            if split_type == 'chunk':
-                 formatted_basename = current_format.format(**format_args)
-            else: # key split - index is string
-                # Ensure the format string doesn't try to apply number formatting to the key string
-                temp_format = current_format.replace("{index:04d}", "{index}") # Basic safeguard
-                formatted_basename = temp_format.format(**format_args)
+            # Apply the precompiled format to get the basename
+            current_format, render_basename = self._chunk_filename_renderer(split_type, extension)
+            formatted_basename = render_basename(index_val, part_suffix)
 
             # Construct the full path
             output_filename = os.path.join(self.output_dir, formatted_basename)
@@ -160,28 +494,30 @@ class SplitterBase:
         # Track file before attempting to write
         self.created_files_set.add(output_filename)
 
-        self.log.info(f"  Writing chunk to {output_filename} ({len(chunk_data)} items)...")
-        self.log.debug(f"    Format: {self.output_format}, Index: {index_val}, Part: {part_index}")
+        self.log.info(f"  Writing chunk to {output_filename} ({item_count} items)...")
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"    Format: {self.output_format}, Index: {index_val}, Part: {part_index}")
 
         try:
             # Ensure output directory exists (should have been validated/created by cli.py, but double-check)
-            # output_dir = os.path.dirname(output_filename) # No longer needed, self.output_dir is known
-            if self.output_dir:
-                os.makedirs(self.output_dir, exist_ok=True)
-
-            # Use 'w' mode; each call creates/overwrites a distinct file part
-            with open(output_filename, 'w', encoding='utf-8') as outfile:
-                if self.output_format == 'jsonl':
-                    for item in chunk_data:
-                        json.dump(item, outfile)
-                        outfile.write('\n')
-                else: # json
-                    json.dump(chunk_data, outfile, indent=4)
+            self._ensure_output_dir()
+
+            # Items are written compactly, one per line: JSONL as-is, JSON as an array
+            # ("[", items separated by ",", "]"), so sizes match the splitters' estimates.
+            # The file is written with one call (truncating; each call creates/overwrites
+            # a distinct file part).
+            if self.output_format == 'jsonl':
+                parts = (chunk_data, b'\n')
+            else: # json
+                parts = (b'[\n', chunk_data, b'\n]\n')
+            fd = os.open(output_filename, CHUNK_FILE_OPEN_FLAGS, 0o644)
+            try:
+                _write_all_parts(fd, parts)
+            finally:
+                os.close(fd)
             return output_filename # Return filename on success
         except IOError as e:
             self.log.error(f"Error writing to file {output_filename}: {e}")
-        except TypeError as e:
-            self.log.error(f"Error serializing data for {output_filename}: {e}")
         return None # Indicate failure
 
 # --- Concrete Splitter Implementations ---
@@ -209,6 +545,12 @@ class CountSplitter(SplitterBase):
                 self.log.info(f"Primary count={self.count}, secondary max_records={self.max_records}, secondary max_size set (~{self.max_size_bytes / (1024*1024):.2f}MB).")
         elif self.max_size_bytes:
             self.log.info(f"Primary count={self.count}, secondary max_size set (~{self.max_size_bytes / (1024*1024):.2f}MB).")
+        # Without secondary limits every file simply holds `count` items
+        records_only = split_by_max_records_only or not self.max_size_bytes
+
+        # Chunks are written on a background thread while parsing continues
+        writer = _ChunkWriterThread(self._write_chunk)
+        write_chunk = writer.submit
 
         try:
             if split_by_max_records_only:
@@ -221,48 +563,66 @@ class CountSplitter(SplitterBase):
             # Initialize Progress Tracker
             tracker = ProgressTracker(logger=self.log, report_interval=self._report_interval)
 
+            # JSON Lines in and out with only record limits: whole lines can be copied as they are
+            if self.input_is_jsonl and self.output_format == 'jsonl' and self.max_size_bytes is None:
+                self.log.info("Input and output are JSON Lines: copying lines without parsing them.")
+                self._split_jsonl_lines(effective_record_limit, write_chunk, tracker)
+                return self._finish_chunk_writes(writer, tracker)
+
+            if records_only:
+                with open(self.input_file, 'rb') as f:
+                    self._split_by_record_count(self._iter_input_items(f), effective_record_limit, write_chunk, tracker)
+                return self._finish_chunk_writes(writer, tracker)
+
             with open(self.input_file, 'rb') as f:
-                items_iterator = ijson.items(f, self.path)
-                chunk = []
+                items_iterator = self._iter_input_items(f)
+                # Encoded items accumulate in one buffer, already joined by the separator
+                separator = self._item_separator
+                chunk = bytearray()
+                chunk_items = 0
+                last_item_start = 0 # Offset of the newest item, for size carry-over
                 primary_chunk_index = 0
-                items_in_primary_chunk = 0 # Used when NOT split_by_max_records_only
-                part_file_index = 0       # Used when NOT split_by_max_records_only
+                items_in_primary_chunk = 0
+                part_file_index = 0
                 item_count_total = 0
-                current_part_size_bytes = 0
-                base_overhead = 2 if self.output_format == 'json' else 0
-                per_item_overhead = 4 if self.output_format == 'json' else 1
+                base_overhead = JSON_ARRAY_OVERHEAD if self.output_format == 'json' else JSONL_ITEM_OVERHEAD
+                per_item_overhead = JSON_ITEM_OVERHEAD if self.output_format == 'json' else JSONL_ITEM_OVERHEAD
+                # Every item adds its size plus a separator; starting one separator short
+                # accounts for the first item having none without a per-item branch
+                empty_part_size = base_overhead - per_item_overhead
+                current_part_size_bytes = empty_part_size
                 # last_progress_report_item = 0 # Removed legacy tracker var
+                # Bind per-item lookups to locals for the hot loop
+                count = self.count
+                max_records = self.max_records
+                max_size_bytes = self.max_size_bytes
+                dumps = _dumps_bytes
+                tracker_update = tracker.update
+                log_debug = self.log.debug
+                debug_enabled = self.log.isEnabledFor(logging.DEBUG)
 
                 for item_count_total, item in enumerate(items_iterator, 1):
                     # last_progress_report_item = self._progress_report(item_count_total, last_progress_report_item) # Removed legacy call
-                    tracker.update(item_count_total) # Call new tracker update
+                    tracker_update(item_count_total) # Call new tracker update
 
-                    # Mode 1: Split strictly by max_records
-                    if split_by_max_records_only:
-                        chunk.append(item)
-                        if len(chunk) == effective_record_limit:
-                            self._write_chunk(primary_chunk_index, chunk, part_index=None, split_type='chunk')
-                            primary_chunk_index += 1
-                            chunk = []
+                    # Encode once; the chunk holds the bytes that _write_chunk writes out
+                    try:
+                        item_bytes = dumps(item)
+                    except TypeError as e:
+                        self.log.warning(f"Could not serialize item {item_count_total}: {e}. Skipping.")
                         continue
 
-                    # Mode 2: Split by primary count with secondary limits
-                    item_size = 0
-                    if self.max_size_bytes:
-                        try:
-                            item_str = json.dumps(item)
-                            item_bytes = item_str.encode('utf-8')
-                            item_size = len(item_bytes)
-                        except TypeError as e:
-                            self.log.warning(f"Could not serialize item {item_count_total} to estimate size: {e}. Skipping size check.")
-                            item_size = 0
+                    # Split by primary count with secondary limits
+                    item_size = len(item_bytes) if max_size_bytes else 0
 
                     # Add item to chunk
-                    chunk.append(item)
+                    if chunk_items:
+                        chunk += separator
+                    last_item_start = len(chunk)
+                    chunk += item_bytes
+                    chunk_items += 1
                     items_in_primary_chunk += 1
-                    current_part_size_bytes += item_size + (per_item_overhead if len(chunk) > 1 else 0)
-                    if len(chunk) == 1:
-                        current_part_size_bytes = base_overhead + item_size # Correct size for first item
+                    current_part_size_bytes += item_size + per_item_overhead
 
                     # Determine if split is needed
                     part_split_needed = False
@@ -270,76 +630,82 @@ class CountSplitter(SplitterBase):
                     item_to_carry_over = None
 
                     # Check secondary limits
-                    if self.max_records and len(chunk) == self.max_records:
-                        self.log.debug(f"Part record limit ({self.max_records}) reached for chunk {primary_chunk_index}, part {part_file_index}.")
+                    if max_records and chunk_items == max_records:
+                        if debug_enabled:
+                            log_debug(f"Part record limit ({max_records}) reached for chunk {primary_chunk_index}, part {part_file_index}.")
                         part_split_needed = True
-                    elif self.max_size_bytes and current_part_size_bytes > self.max_size_bytes and len(chunk) > 1:
-                        self.log.debug(f"Part size limit (~{self.max_size_bytes / (1024*1024):.2f}MB) reached for chunk {primary_chunk_index}, part {part_file_index}.")
+                    elif max_size_bytes and current_part_size_bytes > max_size_bytes and chunk_items > 1:
+                        if debug_enabled:
+                            log_debug(f"Part size limit (~{max_size_bytes / (1024*1024):.2f}MB) reached for chunk {primary_chunk_index}, part {part_file_index}.")
                         part_split_needed = True
-                        item_to_carry_over = chunk.pop()
+                        item_to_carry_over = item_bytes # The newest item, which is last in the buffer
+                        del chunk[last_item_start - len(separator):]
+                        chunk_items -= 1
                         items_in_primary_chunk -= 1
-                        try:
-                            carry_bytes = json.dumps(item_to_carry_over).encode('utf-8')
-                            current_part_size_bytes -= (len(carry_bytes) + per_item_overhead)
-                        except TypeError:
-                            self.log.warning("Could not re-encode carried over item for size adjustment.")
+                        current_part_size_bytes -= (len(item_to_carry_over) + per_item_overhead)
 
                     # Check primary limit
-                    if items_in_primary_chunk == self.count:
-                        self.log.debug(f"Primary count limit ({self.count}) reached for chunk {primary_chunk_index}.")
+                    if items_in_primary_chunk == count:
+                        if debug_enabled:
+                            log_debug(f"Primary count limit ({count}) reached for chunk {primary_chunk_index}.")
                         primary_split_needed = True
                         part_split_needed = False # Primary takes precedence
 
                     # Perform splits if needed
                     if part_split_needed or primary_split_needed:
-                        data_to_write = chunk if not item_to_carry_over else chunk[:-1] # Don't write carried-over item yet
-                        if part_split_needed and not primary_split_needed:
-                            self.log.debug(f"Writing part {part_file_index} for chunk {primary_chunk_index} due to secondary limit.")
-                        elif primary_split_needed:
-                            self.log.debug(f"Writing final part {part_file_index} for chunk {primary_chunk_index} due to primary limit.")
+                        data_to_write = chunk # A carried-over item was already popped off the chunk
+                        if debug_enabled:
+                            if part_split_needed and not primary_split_needed:
+                                log_debug(f"Writing part {part_file_index} for chunk {primary_chunk_index} due to secondary limit.")
+                            elif primary_split_needed:
+                                log_debug(f"Writing final part {part_file_index} for chunk {primary_chunk_index} due to primary limit.")
 
                         if data_to_write:
-                            self._write_chunk(primary_chunk_index, data_to_write, part_index=part_file_index, split_type='chunk')
+                            write_chunk(primary_chunk_index, data_to_write, part_index=part_file_index, split_type='chunk', item_count=chunk_items)
                         else:
                             self.log.warning(f"Skipping write for chunk {primary_chunk_index} part {part_file_index} as there is no data to write (likely due to carry-over). ")
 
-                        # Reset for next part/chunk
-                        chunk = []
-                        current_part_size_bytes = base_overhead # Start with base overhead
+                        # Reset for next part/chunk (a new buffer: the written one now belongs to the writer)
+                        chunk = bytearray()
+                        chunk_items = 0
+                        current_part_size_bytes = empty_part_size
                         part_file_index += 1 # Increment part index after writing
 
                         if item_to_carry_over:
-                            chunk.append(item_to_carry_over)
+                            chunk += item_to_carry_over
+                            chunk_items = 1
                             items_in_primary_chunk += 1 # Re-add count for carried over
-                            # Recalculate size for the carried-over item
-                            try:
-                                item_str = json.dumps(item_to_carry_over)
-                                item_bytes = item_str.encode('utf-8')
-                                item_size = len(item_bytes)
-                            except TypeError: item_size = 0 # Fallback
-                            current_part_size_bytes += item_size
+                            current_part_size_bytes += len(item_to_carry_over) + per_item_overhead
                             item_to_carry_over = None # Clear carried item
 
+                            # If the carried item completes the primary chunk, it is written as
+                            # the chunk's last part now; otherwise the primary count would be
+                            # skipped over and the chunk would never be closed.
+                            if items_in_primary_chunk >= count and not primary_split_needed:
+                                if debug_enabled:
+                                    log_debug(f"Primary count limit ({count}) reached for chunk {primary_chunk_index} by carried-over item.")
+                                write_chunk(primary_chunk_index, chunk, part_index=part_file_index, split_type='chunk', item_count=chunk_items)
+                                chunk = bytearray()
+                                chunk_items = 0
+                                current_part_size_bytes = empty_part_size
+                                primary_split_needed = True
+
                         if primary_split_needed:
                             primary_chunk_index += 1
                             items_in_primary_chunk = 0
                             part_file_index = 0 # Reset part index for new primary chunk
                             # Reset chunk and size again if it was just populated by carry-over
                             if chunk: # If carry-over happened
-                                 chunk = []
-                                 current_part_size_bytes = base_overhead
+                                 chunk = bytearray()
+                                 chunk_items = 0
+                                 current_part_size_bytes = empty_part_size
                                  items_in_primary_chunk = 0
 
-                # Write any remaining data after the loop
+                # Write any remaining data after the loop, as the current chunk's last part
                 if chunk:
-                    if split_by_max_records_only:
-                         self._write_chunk(primary_chunk_index, chunk, part_index=None, split_type='chunk')
-                    else:
-                        # Use the current primary_chunk_index and part_file_index for the last file
-                         self._write_chunk(primary_chunk_index, chunk, part_index=part_file_index, split_type='chunk')
+                    write_chunk(primary_chunk_index, chunk, part_index=part_file_index, split_type='chunk', item_count=chunk_items)
 
-            tracker.finalize() # Call finalize after loop
-            return True # Indicate success
+            return self._finish_chunk_writes(writer, tracker) # Finalizes the tracker on success
 
         except FileNotFoundError:
             self.log.error(f"Error: Input file '{self.input_file}' not found.")
@@ -358,6 +724,42 @@ class CountSplitter(SplitterBase):
         except Exception as e:
             self.log.exception("An unexpected error occurred during count splitting:")
             return False
+        finally:
+            writer.close() # Let queued chunks finish (they are cleaned up by the caller on failure)
+
+    def _split_by_record_count(self, items_iterator, records_per_file, write_chunk, tracker):
+        """Writes every `records_per_file` encoded items to the next chunk file.
+
+        The loop for splits with only a record limit, kept free of the part and
+        size bookkeeping that secondary limits need.
+        """
+        separator = self._item_separator
+        dumps = _dumps_bytes
+        tracker_update = tracker.update
+        chunk = bytearray()
+        chunk_items = 0
+        chunk_index = 0
+
+        for item_count_total, item in enumerate(items_iterator, 1):
+            tracker_update(item_count_total)
+            try:
+                item_bytes = dumps(item)
+            except TypeError as e:
+                self.log.warning(f"Could not serialize item {item_count_total}: {e}. Skipping.")
+                continue
+
+            if chunk_items:
+                chunk += separator
+            chunk += item_bytes
+            chunk_items += 1
+            if chunk_items == records_per_file:
+                write_chunk(chunk_index, chunk, part_index=None, split_type='chunk', item_count=chunk_items)
+                chunk_index += 1
+                chunk = bytearray() # The written buffer now belongs to the writer
+                chunk_items = 0
+
+        if chunk:
+            write_chunk(chunk_index, chunk, part_index=None, split_type='chunk', item_count=chunk_items)
 
 
 class SizeSplitter(SplitterBase):
@@ -397,81 +799,100 @@ class SizeSplitter(SplitterBase):
 
         # Initialize Progress Tracker
         tracker = ProgressTracker(logger=self.log, report_interval=self._report_interval)
+        # Chunks are written on a background thread while parsing continues
+        writer = _ChunkWriterThread(self._write_chunk)
+        write_chunk = writer.submit
 
         try:
+            # JSON Lines in and out: whole lines can be measured and copied as they are
+            if self.input_is_jsonl and self.output_format == 'jsonl':
+                self.log.info("Input and output are JSON Lines: copying lines without parsing them.")
+                self._split_jsonl_lines(self.secondary_record_limit, write_chunk, tracker, max_bytes=self.size)
+                return self._finish_chunk_writes(writer, tracker)
+
             with open(self.input_file, 'rb') as f:
-                items_iterator = ijson.items(f, self.path)
-                chunk = []
+                items_iterator = self._iter_input_items(f)
+                # Encoded items accumulate in one buffer, already joined by the separator
+                separator = self._item_separator
+                chunk = bytearray()
+                chunk_items = 0
                 chunk_index = 0
                 item_count_total = 0
-                current_chunk_size_bytes = 0
-                # Rough estimate of overhead: [] for JSON, newlines for JSONL
-                base_overhead = 2 if self.output_format == 'json' else 0
-                # Rough estimate per item: ',' for JSON, newline for JSONL
-                per_item_overhead = 4 if self.output_format == 'json' else 1
+                # Overhead of the output layout: brackets for JSON, newlines for JSONL
+                base_overhead = JSON_ARRAY_OVERHEAD if self.output_format == 'json' else JSONL_ITEM_OVERHEAD
+                # Separator per additional item: ",\n" for JSON, newline for JSONL
+                per_item_overhead = JSON_ITEM_OVERHEAD if self.output_format == 'json' else JSONL_ITEM_OVERHEAD
+                # Every item adds its size plus a separator; starting one separator short
+                # accounts for the first item having none without a per-item branch
+                empty_chunk_size = base_overhead - per_item_overhead
+                current_chunk_size_bytes = empty_chunk_size
                 # last_progress_report_item = 0 # Removed legacy tracker var
+                # Bind per-item lookups to locals for the hot loop
+                size_limit = self.size
+                secondary_record_limit = self.secondary_record_limit
+                dumps = _dumps_bytes
+                tracker_update = tracker.update
+                log_debug = self.log.debug
+                debug_enabled = self.log.isEnabledFor(logging.DEBUG)
 
                 for item_count_total, item in enumerate(items_iterator, 1):
                     # last_progress_report_item = self._progress_report(item_count_total, last_progress_report_item) # Removed legacy call
-                    tracker.update(item_count_total) # Call new tracker update
+                    tracker_update(item_count_total) # Call new tracker update
 
-                    # Calculate item size
-                    item_size = 0
+                    # Encode once: the length drives the split and the bytes are what gets written
                     try:
-                        # Serialize item to estimate size
-                        # Using separators=(',', ':') for slightly smaller size, closer to file size
-                        item_str = json.dumps(item, separators=(',', ':'))
-                        item_bytes = item_str.encode('utf-8')
-                        item_size = len(item_bytes)
+                        item_bytes = dumps(item)
                     except TypeError as e:
-                        self.log.warning(f"Could not serialize item {item_count_total} to estimate size: {e}. Skipping size check for split.")
-                        # Treat as 0 size for splitting logic, but still add to chunk
-                        item_size = 0
+                        self.log.warning(f"Could not serialize item {item_count_total}: {e}. Skipping.")
+                        continue
+                    item_size = len(item_bytes)
 
                     # Determine if adding this item exceeds limits
-                    potential_next_size = current_chunk_size_bytes + item_size + (per_item_overhead if chunk else 0)
-                    exceeds_primary_size = potential_next_size > self.size and len(chunk) > 0
-                    exceeds_secondary_records = self.secondary_record_limit and (len(chunk) + 1) > self.secondary_record_limit
+                    potential_next_size = current_chunk_size_bytes + item_size + per_item_overhead
+                    exceeds_primary_size = potential_next_size > size_limit and chunk_items > 0
+                    exceeds_secondary_records = secondary_record_limit and (chunk_items + 1) > secondary_record_limit
 
                     # Split if necessary *before* adding the current item
                     if exceeds_primary_size or exceeds_secondary_records:
                         if chunk: # Only write if there's something in the current chunk
-                            reason = "size limit" if exceeds_primary_size else "record limit"
-                            self.log.debug(f"Writing chunk {chunk_index} due to {reason} ({len(chunk)} items, ~{current_chunk_size_bytes / (1024*1024):.2f} MB)...")
-                            self._write_chunk(chunk_index, chunk, split_type='chunk')
-                            chunk = []
-                            current_chunk_size_bytes = base_overhead # Reset size
+                            if debug_enabled:
+                                reason = "size limit" if exceeds_primary_size else "record limit"
+                                log_debug(f"Writing chunk {chunk_index} due to {reason} ({chunk_items} items, ~{current_chunk_size_bytes / (1024*1024):.2f} MB)...")
+                            write_chunk(chunk_index, chunk, split_type='chunk', item_count=chunk_items)
+                            chunk = bytearray() # The written buffer now belongs to the writer
+                            chunk_items = 0
+                            current_chunk_size_bytes = empty_chunk_size # Reset size
                             chunk_index += 1
                         else:
                             # This happens if a single item exceeds the size limit
-                            self.log.warning(f"Item {item_count_total} alone (size ~{item_size / (1024*1024):.2f} MB) may exceed the target chunk size of {self.size / (1024*1024):.2f} MB. Writing it to its own file.")
+                            self.log.warning(f"Item {item_count_total} alone (size ~{item_size / (1024*1024):.2f} MB) may exceed the target chunk size of {size_limit / (1024*1024):.2f} MB. Writing it to its own file.")
                             # We will add it below and potentially write it immediately if it also hits record limit
                             pass
 
                     # Add the current item to the (potentially new) chunk
-                    chunk.append(item)
-                    # Update size: add item size and overhead if it's not the first item
-                    current_chunk_size_bytes += item_size + (per_item_overhead if len(chunk) > 1 else 0)
-                    # Correct size if it's the very first item in the chunk
-                    if len(chunk) == 1:
-                        current_chunk_size_bytes = base_overhead + item_size
+                    if chunk_items:
+                        chunk += separator
+                    chunk += item_bytes
+                    chunk_items += 1
+                    current_chunk_size_bytes += item_size + per_item_overhead
 
                     # Special case: If the *first* item added also hits the secondary record limit (limit is 1)
-                    if len(chunk) == 1 and self.secondary_record_limit == 1:
-                         self.log.debug(f"Writing chunk {chunk_index} due to record limit=1.")
-                         self._write_chunk(chunk_index, chunk, split_type='chunk')
-                         chunk = []
-                         current_chunk_size_bytes = base_overhead
+                    if chunk_items == 1 and secondary_record_limit == 1:
+                         if debug_enabled:
+                             log_debug(f"Writing chunk {chunk_index} due to record limit=1.")
+                         write_chunk(chunk_index, chunk, split_type='chunk', item_count=chunk_items)
+                         chunk = bytearray()
+                         chunk_items = 0
+                         current_chunk_size_bytes = empty_chunk_size
                          chunk_index += 1
 
 
                 # Write any remaining items after the loop
                 if chunk:
-                     self.log.debug(f"Writing final chunk {chunk_index} ({len(chunk)} items, ~{current_chunk_size_bytes / (1024*1024):.2f} MB)...")
-                     self._write_chunk(chunk_index, chunk, split_type='chunk')
+                     self.log.debug(f"Writing final chunk {chunk_index} ({chunk_items} items, ~{current_chunk_size_bytes / (1024*1024):.2f} MB)...")
+                     write_chunk(chunk_index, chunk, split_type='chunk', item_count=chunk_items)
 
-            tracker.finalize() # Call finalize after loop
-            return True # Indicate success
+            return self._finish_chunk_writes(writer, tracker) # Finalizes the tracker on success
 
         except ijson.JSONError as e:
             self.log.error(f"Invalid JSON encountered in '{self.input_file}' at path '{self.path}': {e}")
@@ -485,11 +906,13 @@ class SizeSplitter(SplitterBase):
         except Exception as e:
             self.log.exception("An unexpected error occurred during size splitting:")
             return False
+        finally:
+            writer.close() # Let queued chunks finish (they are cleaned up by the caller on failure)
 
 
 class KeySplitter(SplitterBase):
     """Splits JSON objects based on the value of a specified key."""
-    def __init__(self, key_name, on_missing_key='group', on_invalid_item='warn', **kwargs):
+    def __init__(self, key_name, on_missing_key='group', on_invalid_item='warn', max_open_files=None, **kwargs):
         # Key splitting forces jsonl
         output_format = kwargs.get('output_format', 'jsonl')
         if output_format == 'json':
@@ -502,28 +925,47 @@ class KeySplitter(SplitterBase):
         self.on_invalid_item = on_invalid_item
         if not self.key_name:
             raise ValueError("Key name cannot be empty for key splitting.")
+        if max_open_files is not None and max_open_files <= 0:
+            raise ValueError("Max open files must be a positive integer.")
+        self.max_open_files = max_open_files # None: MAX_OPEN_FILES_KEY_SPLIT
+        self._key_buffered_bytes = 0
+        self._key_file_ids = set() # (st_dev, st_ino) of the files started in this run
 
         # Key splitter specific defaults/logic
         self.output_format = 'jsonl' # Enforce
         self.file_format_extension = 'jsonl'
         # Override default filename format if not provided or unsuitable
         if not self.filename_format or '{index:04d}' in self.filename_format:
-             default_key_format = "{base_name}_key_{index}{part}.{ext}"
+             default_key_format = DEFAULT_KEY_FILENAME_FORMAT
              if self.filename_format and self.filename_format != default_key_format:
                   self.log.debug(f"Using default filename format for key splitting: '{default_key_format}'")
              self.filename_format = default_key_format
 
+        # Parse the filename template once; only the key and part suffix vary per file.
+        try:
+            self._render_basename = compile_filename_format(
+                self.filename_format, base_name=self.base_name, type='key', ext=self.file_format_extension)
+        except ValueError as e:
+            self.log.error(f"Error applying filename format '{self.filename_format}': {e}. Using fallback naming.")
+            self._render_basename = compile_filename_format(
+                DEFAULT_KEY_FILENAME_FORMAT, base_name=self.base_name, type='key', ext=self.file_format_extension)
+
     def split(self):
         self.log.info(f"Splitting '{self.input_file}' at path '{self.path}' by key '{self.key_name}'...")
         self.log.info(f"Output directory: {os.path.abspath(self.output_dir)}")
         self.log.info(f"Base name: {self.base_name}")
-        self.log.info(f"Maximum open files cache size: {MAX_OPEN_FILES_KEY_SPLIT}")
+        # Pool of raw output fds; the least recently used is closed and reopened on demand
+        open_files = HandlePool(_default_max_open_files(self.max_open_files))
+        if self.max_open_files is not None and open_files.max_open < self.max_open_files:
+            self.log.warning(f"--max-open-files {self.max_open_files} exceeds half of the process open-file limit; using {open_files.max_open}.")
+        self.log.info(f"Maximum open files: {open_files.max_open}")
         if self.max_records: self.log.info(f"  Secondary limit: Max {self.max_records} records per file part.")
         if self.max_size_bytes: self.log.info(f"  Secondary limit: Max ~{self.max_size_bytes / (1024*1024):.2f} MB per file part.")
 
-        # Use cachetools LRUCache for managing file handles
-        open_files_cache = LRUCache(maxsize=MAX_OPEN_FILES_KEY_SPLIT)
         file_stats = {} # Track records/size per file {filename: {count: N, size: M, part: P}}
+        self._key_buffered_bytes = 0 # Sum of all keys' buffers, kept under KEY_WRITE_BUFFER_TOTAL
+        self._key_file_ids = set()
+        buffer_budget = KEY_WRITE_BUFFER_TOTAL
         tracker = ProgressTracker(logger=self.log, report_interval=self._report_interval)
 
         items_processed = 0
@@ -537,49 +979,74 @@ class KeySplitter(SplitterBase):
         success_flag = True # Assume success initially
         # last_progress_report_item = 0 # Removed legacy var
 
+        # Bind loop invariants to locals once; attribute and global lookups add up
+        # over millions of items. Debug output is gated on the level up front so
+        # the f-strings below are never built when verbose logging is off.
+        key_name = self.key_name
+        path = self.path
+        on_invalid_item = self.on_invalid_item
+        on_missing_key = self.on_missing_key
+        max_records = self.max_records
+        max_size_bytes = self.max_size_bytes
+        has_part_limits = bool(max_records or max_size_bytes) # Without limits each key is a single file
+        dumps = _dumps_bytes
+        sanitize = sanitize_filename
+        # Repeated string keys skip re-sanitizing. Only strings are cached: equal
+        # values of other types (1, 1.0, True, Decimal('1.0')/('1.00')) would share
+        # an entry but sanitize to different names.
+        sanitize_str = functools.lru_cache(maxsize=SANITIZED_KEY_CACHE_SIZE)(sanitize_filename)
+        log_debug = self.log.debug
+        log_warning = self.log.warning
+        debug_enabled = self.log.isEnabledFor(logging.DEBUG)
+        tracker_update = tracker.update
+        get_stats = file_stats.get
+
         try:
             with open(self.input_file, 'rb') as f:
-                items_iterator = ijson.items(f, self.path)
+                items_iterator = self._iter_input_items(f)
 
                 for items_processed, item in enumerate(items_iterator, 1):
-                    # last_progress_report_item = self._progress_report(items_processed, last_progress_report_item) # Removed legacy call
-                    tracker.update(items_processed) # Call new tracker update
+                    tracker_update(items_processed)
 
                     # Validate item type (must be dict-like for key access)
                     if not isinstance(item, dict):
-                        msg = f"Item {items_processed} at path '{self.path}' is not an object (type: {type(item)})."
-                        if self.on_invalid_item == 'error':
+                        msg = f"Item {items_processed} at path '{path}' is not an object (type: {type(item)})."
+                        if on_invalid_item == 'error':
                             self.log.error(msg)
                             # Set failure flag and break loop on error
                             success_flag = False
                             break
-                        elif self.on_invalid_item == 'skip':
-                            self.log.debug(f"Skipping: {msg}"); continue
+                        elif on_invalid_item == 'skip':
+                            if debug_enabled: log_debug(f"Skipping: {msg}")
+                            continue
                         else: # warn
-                            self.log.warning(f"{msg} Skipping key check."); continue
+                            log_warning(f"{msg} Skipping key check."); continue
 
                     key_value_original = "[unknown]" # For logging
                     try:
-                        key_value_original = item.get(self.key_name)
+                        key_value_original = item.get(key_name)
                         sanitized_value = None
-                        should_skip_item = False
 
                         # --- Determine Key/Grouping --- #
-                        if key_value_original is None:
-                            if self.on_missing_key == 'error':
-                                self.log.error(f"Key '{self.key_name}' not found in item {items_processed}.")
+                        # String keys are by far the most common: one exact type check
+                        # sends them straight to the cached sanitizer, ahead of the rarer cases
+                        if type(key_value_original) is str:
+                            sanitized_value = sanitize_str(key_value_original)
+                        elif key_value_original is None:
+                            if on_missing_key == 'error':
+                                self.log.error(f"Key '{key_name}' not found in item {items_processed}.")
                                 success_flag = False; break
-                            elif self.on_missing_key == 'skip':
-                                self.log.debug(f"Skipping item {items_processed}: Key '{self.key_name}' missing.")
+                            elif on_missing_key == 'skip':
+                                if debug_enabled: log_debug(f"Skipping item {items_processed}: Key '{key_name}' missing.")
                                 items_skipped_missing_key += 1; continue
                             else: # group
                                 sanitized_value = "__missing_key__"
                         elif isinstance(key_value_original, (dict, list)):
                             complex_type = type(key_value_original).__name__
-                            sanitized_value = f"__complex_type_{sanitize_filename(complex_type)}__"
-                            self.log.warning(f"Key '{self.key_name}' in item {items_processed} is complex ({complex_type}). Grouping as '{sanitized_value}'.")
+                            sanitized_value = f"__complex_type_{sanitize(complex_type)}__"
+                            log_warning(f"Key '{key_name}' in item {items_processed} is complex ({complex_type}). Grouping as '{sanitized_value}'.")
                         else:
-                            sanitized_value = sanitize_filename(key_value_original)
+                            sanitized_value = sanitize(key_value_original)
 
                         if sanitized_value is None: # Should not happen if logic above is correct
                              self.log.error(f"Internal error: Sanitized value is None for item {items_processed}. Skipping.")
@@ -587,75 +1054,70 @@ class KeySplitter(SplitterBase):
 
                         # --- Serialize Item (needed for size checks and writing) --- #
                         item_size = 0
-                        item_str = None
                         try:
-                            item_str = json.dumps(item)
-                            if self.max_size_bytes:
-                                item_bytes = item_str.encode('utf-8')
+                            item_bytes = dumps(item)
+                            if max_size_bytes:
                                 item_size = len(item_bytes) + 1 # +1 for newline
                         except TypeError as e:
-                            self.log.warning(f"Could not serialize item {items_processed} (key: {sanitized_value}): {e}. Skipping.")
+                            log_warning(f"Could not serialize item {items_processed} (key: {sanitized_value}): {e}. Skipping.")
                             continue
 
                         # --- Check Secondary Limits and Determine File Part --- #
-                        current_state = file_stats.get(sanitized_value, {'count': 0, 'size': 0, 'part': 0})
+                        # One lookup for the common case of a key that was seen before
+                        current_state = get_stats(sanitized_value)
+                        if current_state is None:
+                            if len(file_stats) == MAX_UNIQUE_KEYS_WARN_THRESHOLD:
+                                log_warning(f"Key '{key_name}' has more than {MAX_UNIQUE_KEYS_WARN_THRESHOLD:,} distinct values; "
+                                            f"each one gets its own output file. Check that this is the intended key.")
+                            current_state = {'count': 0, 'size': 0, 'part': 0, 'buf': bytearray()}
+                            file_stats[sanitized_value] = current_state
                         needs_new_part = False
-                        if current_state['count'] > 0: # Only consider splitting if part has items
-                            if self.max_records and current_state['count'] >= self.max_records:
+                        if has_part_limits and current_state['count'] > 0: # Only consider splitting if part has items
+                            if max_records and current_state['count'] >= max_records:
                                 needs_new_part = True
-                                split_reason = f"record limit ({self.max_records})"
-                            elif self.max_size_bytes and (current_state['size'] + item_size) > self.max_size_bytes:
+                                split_reason = f"record limit ({max_records})"
+                            elif max_size_bytes and (current_state['size'] + item_size) > max_size_bytes:
                                 needs_new_part = True
-                                split_reason = f"size limit (~{self.max_size_bytes / (1024*1024):.2f}MB)"
+                                split_reason = f"size limit (~{max_size_bytes / (1024*1024):.2f}MB)"
 
                         if needs_new_part:
-                            self.log.debug(f"Split needed for key '{sanitized_value}' part {current_state['part']} due to {split_reason}. Starting new part.")
-                            # Close the *previous* part's handle if it's in the cache
+                            if debug_enabled: log_debug(f"Split needed for key '{sanitized_value}' part {current_state['part']} due to {split_reason}. Starting new part.")
+                            # Write out what is buffered for the finished part, then close its handle
+                            if not self._flush_key_buffer(sanitized_value, current_state, open_files, file_stats):
+                                success_flag = False; break
                             try:
-                                old_handle, old_file_path = self._get_or_open_file(sanitized_value, current_state['part'], open_files_cache, file_stats, open_if_missing=False)
-                                if old_file_path and old_file_path in open_files_cache:
-                                    evicted_handle = open_files_cache.pop(old_file_path)
-                                    if evicted_handle and not evicted_handle.closed:
-                                        evicted_handle.close()
-                                        self.log.debug(f"Closed handle for previous part: {old_file_path}")
+                                # The part's path is cached once it has been written to; whether
+                                # its descriptor is still open is simply whether the pool holds it
+                                old_file_path = current_state.get('path')
+                                if old_file_path is not None and open_files.close(old_file_path):
+                                    if debug_enabled: log_debug(f"Closed handle for previous part: {old_file_path}")
                             except Exception as e:
-                                 self.log.warning(f"Could not close previous file part handle for {sanitized_value}: {e}")
+                                 log_warning(f"Could not close previous file part handle for {sanitized_value}: {e}")
 
                             # Increment part index and reset stats for the new part
                             current_state['part'] += 1
                             current_state['count'] = 0
                             current_state['size'] = 0
-                            file_stats[sanitized_value] = current_state # Update stats with new part info
-
-                        # --- Get File Handle for Current Part --- #
-                        current_part_index = current_state['part']
-                        current_handle, current_file_path = self._get_or_open_file(
-                            sanitized_value,
-                            current_part_index,
-                            open_files_cache,
-                            file_stats
-                        )
-
-                        if current_handle is None or current_handle.closed:
-                             self.log.error(f"Failed to get valid file handle for key '{sanitized_value}', part {current_part_index}. Skipping item {items_processed}.")
-                             continue
 
-                        # --- Write Item --- #
-                        try:
-                            current_handle.write(item_str + '\n')
-                            items_written += 1
-                            # Update state AFTER successful write
-                            current_state['count'] += 1
+                        # --- Buffer Item --- #
+                        # Items are collected per key and written in blocks of about
+                        # KEY_WRITE_BUFFER_SIZE bytes instead of one small write per item.
+                        pending = current_state['buf']
+                        pending += item_bytes
+                        pending += b'\n'
+                        self._key_buffered_bytes += len(item_bytes) + 1
+                        items_written += 1
+                        current_state['count'] += 1
+                        if max_size_bytes:
                             current_state['size'] += item_size
-                            file_stats[sanitized_value] = current_state # Store updated stats
-                        except IOError as e:
-                            self.log.error(f"Failed to write to file '{current_file_path}' for key '{sanitized_value}': {e}. Closing handle.")
-                            try: current_handle.close() # Attempt to close
-                            except: pass
-                            # Remove from cache to force reopen on next attempt
-                            if current_file_path in open_files_cache: open_files_cache.pop(current_file_path)
-                            state['handle'] = None # Mark state as needing reopen (if state is used elsewhere)
-                            continue # Skip this item
+                        if len(pending) >= KEY_WRITE_BUFFER_SIZE:
+                            if not self._flush_key_buffer(sanitized_value, current_state, open_files, file_stats):
+                                success_flag = False; break
+                        elif self._key_buffered_bytes > buffer_budget:
+                            # Many keys each holding part of a block: write out the largest
+                            # buffers so memory stays bounded however many keys there are
+                            if not self._flush_largest_key_buffers(buffer_budget // 2, open_files, file_stats):
+                                success_flag = False; break
 
                     except (TypeError, ValueError) as e:
                         self.log.error(f"Error processing item {items_processed} (key value: '{key_value_original}'): {e}. Skipping.")
@@ -670,6 +1132,13 @@ class KeySplitter(SplitterBase):
             # End of main processing loop (inside try block)
             self.log.info("Finished processing input file stream.")
 
+            # Write out whatever is still buffered for each key
+            if success_flag:
+                for sanitized_value, state in file_stats.items():
+                    if not self._flush_key_buffer(sanitized_value, state, open_files, file_stats):
+                        success_flag = False
+                        break
+
             # Final log messages and return should happen *before* exception handlers
             if items_written > 0:
                  self.log.info(f"Key splitting finished successfully.")
@@ -708,22 +1177,7 @@ class KeySplitter(SplitterBase):
         finally:
             # This block *always* executes, ensuring files are closed
             self.log.info("Closing remaining open files...")
-            closed_count = 0
-            keys_to_clear = list(open_files_cache.keys())
-            for key in keys_to_clear: # Iterate over keys to allow cache modification
-                 state = open_files_cache.pop(key, None) # Remove from cache
-                 if state:
-                     try:
-                         handle = state.get('handle')
-                         if handle and not handle.closed:
-                             self.log.debug(f"Closing file for key '{key}' part {state.get('part','?')}")
-                             handle.close()
-                             closed_count += 1
-                     except IOError as e:
-                         self.log.warning(f"Error closing file for key '{key}': {e}")
-                     except Exception as e:
-                          self.log.warning(f"Unexpected error closing file for key '{key}': {e}")
-            open_files_cache.clear()
+            closed_count = open_files.close_all(log=self.log)
             self.log.info(f"Closed {closed_count} files during cleanup.")
 
         # Return the success status determined in try/except blocks
@@ -731,99 +1185,144 @@ class KeySplitter(SplitterBase):
              log.error("Splitting process failed or terminated early.")
         return success_flag
 
-    def _get_or_open_file(self, sanitized_key, part_index, file_cache, file_stats, open_if_missing=True):
-        """Gets file handle from cache or opens a new one if open_if_missing is True.
-           Handles filename formatting.
-           Returns (file_handle, full_file_path) or (None, None) on error or if not opening.
+    def _flush_key_buffer(self, sanitized_key, state, handle_pool, file_stats):
+        """Writes the bytes buffered for a key to its current part file and clears the buffer.
+
+        Returns True if the buffer was written (or was empty), False if the data could not be written.
+        """
+        pending = state['buf']
+        if not pending:
+            return True
+        self._key_buffered_bytes -= len(pending) # The buffer is cleared whether or not the write succeeds
+        fd, file_path = self._get_or_open_file(sanitized_key, state['part'], handle_pool, file_stats)
+        if fd is None:
+            self.log.error(f"Failed to get valid file handle for key '{sanitized_key}', part {state['part']}.")
+            pending.clear()
+            return False
+        try:
+            _write_all(fd, pending)
+        except OSError as e:
+            self.log.error(f"Failed to write to file '{file_path}' for key '{sanitized_key}': {e}. Closing handle.")
+            try: handle_pool.close(file_path)
+            except OSError: pass
+            return False
+        finally:
+            pending.clear()
+        return True
+
+    def _flush_largest_key_buffers(self, target_bytes, handle_pool, file_stats):
+        """Writes out key buffers, largest first, until at most target_bytes remain buffered.
+
+        Returns True on success, False if a buffer could not be written.
         """
-        # Generate the base filename using the format string
+        by_size = sorted(file_stats.items(), key=lambda entry: len(entry[1]['buf']), reverse=True)
+        for sanitized_key, state in by_size:
+            if self._key_buffered_bytes <= target_bytes:
+                break
+            if not self._flush_key_buffer(sanitized_key, state, handle_pool, file_stats):
+                return False
+        return True
+
+    def _key_file_path(self, sanitized_key, part_index, state):
+        """Builds the output path for a key's file part, falling back to default naming if the format fails.
+           Returns the full file path, or None if no name could be built.
+        """
+        # Generate the base filename using the precompiled format
         part_suffix = f"_part_{part_index:04d}" if part_index > 0 else ""
-        format_args = {
-            # 'prefix': self.output_prefix,
-            'base_name': self.base_name,
-            'type': 'key',
-            'index': sanitized_key,
-            'part': part_suffix,
-            'ext': self.file_format_extension # Should be jsonl
-        }
+        # The template and the key are fixed, so the path checks below give the same
+        # answer for every part of a key: run them once and remember the verdict.
+        name_ok = state.get('name_ok') if state is not None else None
 
         formatted_basename = ""
         full_file_path = None
-        try:
-            # Determine and apply format string for the basename
-            current_format = self.filename_format
-            if not current_format:
-                current_format = "{base_name}_key_{index}{part}.{ext}"
-            # Ensure the format string doesn't try to apply number formatting to the key string
-            temp_format = current_format.replace("{index:04d}", "{index}") # Basic safeguard
-            formatted_basename = temp_format.format(**format_args)
-
-            # Construct the full path
-            full_file_path = os.path.join(self.output_dir, formatted_basename)
+        if name_ok is not False:
+            try:
+                formatted_basename = self._render_basename(sanitized_key, part_suffix)
+
+                # Construct the full path
+                full_file_path = os.path.join(self.output_dir, formatted_basename)
+
+                if name_ok is None:
+                    # Add basic validation checks similar to _write_chunk
+                    abs_output_dir = os.path.abspath(self.output_dir)
+                    abs_output_file = os.path.abspath(full_file_path)
+                    if not abs_output_file.startswith(abs_output_dir):
+                         raise ValueError(f"Generated filename path '{full_file_path}' attempts to escape the output directory '{self.output_dir}'.")
+                    check_basename = os.path.basename(formatted_basename)
+                    if not check_basename or '/' in check_basename or '\\' in check_basename:
+                         raise ValueError(f"Generated filename '{formatted_basename}' contains invalid path separators or is empty.")
+                    if state is not None:
+                        state['name_ok'] = True
 
-            # Add basic validation checks similar to _write_chunk
-            abs_output_dir = os.path.abspath(self.output_dir)
-            abs_output_file = os.path.abspath(full_file_path)
-            if not abs_output_file.startswith(abs_output_dir):
-                 raise ValueError(f"Generated filename path '{full_file_path}' attempts to escape the output directory '{self.output_dir}'.")
-            check_basename = os.path.basename(formatted_basename)
-            if not check_basename or '/' in check_basename or '\\' in check_basename:
-                 raise ValueError(f"Generated filename '{formatted_basename}' contains invalid path separators or is empty.")
+            except ValueError as e:
+                self.log.error(f"Error applying filename format '{self.filename_format or 'default'}' for key '{sanitized_key}': {e}. Using fallback.")
+                full_file_path = None
+                if state is not None:
+                    state['name_ok'] = False # Go straight to the fallback for later parts
 
-        except (KeyError, ValueError) as e:
-            self.log.error(f"Error applying filename format '{self.filename_format or 'default'}' for key '{sanitized_key}': {e}. Using fallback.")
-            fallback_part_suffix = f"_part_{part_index:04d}" if part_index > 0 else ""
+        if full_file_path is None:
             # Corrected fallback to use self.base_name directly
-            fallback_basename = f"{self.base_name}_key_{sanitized_key}{fallback_part_suffix}.{self.file_format_extension}"
+            fallback_basename = f"{self.base_name}_key_{sanitized_key}{part_suffix}.{self.file_format_extension}"
             full_file_path = os.path.join(self.output_dir, fallback_basename)
-            self.log.warning(f"Using fallback filename: {full_file_path}")
-        except Exception as e:
-                self.log.error(f"Unexpected error formatting filename for key '{sanitized_key}': {e}. Using fallback.")
-                fallback_part_suffix = f"_part_{part_index:04d}" if part_index > 0 else ""
-                # Corrected fallback to use self.base_name directly
-                fallback_basename = f"{self.base_name}_key_{sanitized_key}{fallback_part_suffix}.{self.file_format_extension}"
-                full_file_path = os.path.join(self.output_dir, fallback_basename)
+            if name_ok is None:
                 self.log.warning(f"Using fallback filename: {full_file_path}")
 
-        if full_file_path is None: # Should not happen if fallback works, but safety check
-            self.log.error(f"Could not determine filename for key '{sanitized_key}', part {part_index}. Cannot open file.")
-            return None, None
-
-        # Check cache first
-        if full_file_path in file_cache:
-            # self.log.debug(f"Cache hit for {full_file_path}")
-            return file_cache[full_file_path], full_file_path
+        return full_file_path
 
-        # Not in cache, open file (append mode)
-        self.log.debug(f"Cache miss. Opening {full_file_path} (Append Mode)")
+    def _get_or_open_file(self, sanitized_key, part_index, handle_pool, file_stats):
+        """Gets a raw file descriptor from the handle pool or opens a new one.
+           The path for each key part is built once (see _key_file_path) and kept in the key's state.
+           Returns (fd, full_file_path), or (None, None) on error.
+        """
+        state = file_stats.get(sanitized_key)
+        # Reuse the path resolved for this part; it only changes when the key rolls over to a new part
+        if state is not None and state.get('path_part') == part_index:
+            full_file_path = state['path']
+        else:
+            full_file_path = self._key_file_path(sanitized_key, part_index, state)
+            if full_file_path is None: # Should not happen if fallback works, but safety check
+                self.log.error(f"Could not determine filename for key '{sanitized_key}', part {part_index}. Cannot open file.")
+                return None, None
+            if state is not None:
+                state['path'] = full_file_path
+                state['path_part'] = part_index
+
+        # Check the pool first
+        fd = handle_pool.get(full_file_path)
+        if fd is not None:
+            return fd, full_file_path
+
+        # Not in the pool, open file
+        if self.log.isEnabledFor(logging.DEBUG): # Runs on every open; skip building the message
+            self.log.debug(f"Handle pool miss. Opening {full_file_path}")
         try:
             # Ensure directory exists (should be handled by CLI, but good practice)
-            # output_dir_for_file = os.path.dirname(full_file_path) # We know the dir is self.output_dir
-            if self.output_dir:
-                os.makedirs(self.output_dir, exist_ok=True)
-
-            # Check if this specific file needs to be tracked (first time seeing it)
+            self._ensure_output_dir()
+
+            # Open a raw descriptor. Writes are already batched per key (see
+            # KEY_WRITE_BUFFER_SIZE), so a Python-level buffered writer would only add
+            # another copy of every block. Part numbers only grow, so the first open of
+            # a file in this run starts it afresh (replacing output left by an earlier
+            # run); later opens follow an eviction from the pool and must append.
+            fd = os.open(full_file_path, KEY_FILE_OPEN_FLAGS, 0o644)
             if full_file_path not in self.created_files_set:
-                 self.created_files_set.add(full_file_path)
-                 self.log.info(f"  Creating new output file: {full_file_path}")
-
-            # Open in append mode
-            file_handle = open(full_file_path, 'a', encoding='utf-8')
-
-            # Add to cache
-            file_cache[full_file_path] = file_handle
-
-            # --- Eviction Logic (Handled by LRUCache implicitly) --- #
-            # cachetools LRUCache handles eviction automatically when maxsize is reached.
-            # We need to hook into the eviction to close the file handle.
-            # HOWEVER, cachetools LRUCache doesn't directly support eviction callbacks.
-            # A more complex cache implementation would be needed for robust handle closing on eviction.
-            # For now, we rely on the explicit closing logic during part splits and the final cleanup.
-            # This means we *might* exceed MAX_OPEN_FILES_KEY_SPLIT slightly if eviction happens
-            # before our explicit close calls, but the cache size *will* be enforced.
-            # A potential improvement: Wrap LRUCache or use a different cache with dispose support.
-
-            return file_handle, full_file_path
+                self.created_files_set.add(full_file_path)
+                # Files are told apart by identity, not name: on a case-insensitive
+                # filesystem 'US' and 'us' name the same file, which must not be
+                # truncated again once the other key has written to it
+                st = os.fstat(fd)
+                file_id = (st.st_dev, st.st_ino)
+                if file_id in self._key_file_ids:
+                    self.log.warning(f"Output file '{full_file_path}' is the same file as another key's output; appending to it.")
+                else:
+                    self._key_file_ids.add(file_id)
+                    self.log.info(f"  Creating new output file: {full_file_path}")
+                    os.ftruncate(fd, 0)
+
+            # Add to the pool; the least recently used descriptor is closed if it is full
+            handle_pool.add(full_file_path, fd)
+
+            return fd, full_file_path
 
         except IOError as e:
             self.log.error(f"Could not open file {full_file_path}: {e}")
@@ -1,8 +1,7 @@
 import logging
 import re
 import os
-import json
-import math # Added for parse_size if needed, can remove if only integer math is used
+import string
 import time # <-- Added import
 
 # --- Logging Setup ---
@@ -17,6 +16,24 @@ PROGRESS_REPORT_INTERVAL = 10000 # Report progress every N items
 # Define valid strategies
 VALID_SPLIT_STRATEGIES = {'count', 'size', 'key'}
 
+# Placeholders accepted by --filename-format
+FILENAME_FORMAT_FIELDS = ('base_name', 'type', 'index', 'part', 'ext')
+
+# Input files with these extensions are read as JSON Lines (one item per line)
+JSONL_INPUT_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# Size strings for parse_size: optional minus sign (rejected with its own message),
+# number, optional unit. 'K' and 'KB' (etc.) are the same unit; a bare number is bytes.
+_SIZE_RE = re.compile(r'^(-?)(\d+(?:\.\d+)?)\s*([KMGT]?)B?$')
+_SIZE_MULTIPLIERS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+
+# Runs of characters that sanitize_filename replaces with a single underscore
+_FILENAME_UNSAFE_RE = re.compile(r'[<>:"/\\|?*\x00-\x1F\s]+')
+
+# Default --filename-format templates for count/size chunks and for key split
+DEFAULT_CHUNK_FILENAME_FORMAT = "{base_name}_{type}_{index:04d}{part}.{ext}"
+DEFAULT_KEY_FILENAME_FORMAT = "{base_name}_key_{index}{part}.{ext}"
+
 # --- Helper Functions ---
 
 def parse_size(size_str):
@@ -38,63 +55,16 @@ def parse_size(size_str):
     if size_str in ('B', 'KB', 'MB', 'GB', 'TB', 'K', 'M', 'G', 'T'):
         raise ValueError(f"Missing numeric value before suffix in '{original_input_for_error}'")
 
-    # Check for negative input - use the original non-upper()'d string for the error message if desired
-    # Let's refine the error check based on the test expectation
-    # The test for "-1MB" expected: ValueError("Invalid numeric value '-1' in size string '-1MB'")
-    # This implies the number itself is the problem *within* the context of parsing.
-    # Let's match a potentially negative number first.
-    pre_match = re.match(r'^([-+]?)(\d+(\.\d+)?)\s*([KMGT]?B?)$', size_str)
-
-    if pre_match:
-        sign = pre_match.group(1)
-        num_part_check = pre_match.group(2)
-        if sign == '-':
-            # Raise the specific error the test expects for negative numbers during parse time
-            # We need the *original* case string here ideally, but the test used "-1MB" which is uppercase anyway.
-            # Let's reconstruct the failing part for the message based on parsed components.
-            raise ValueError(f"Invalid numeric value '-{num_part_check}' in size string '{original_input_for_error}'")
-            # Note: parse_size("-1MB") -> original_input_for_error = "-1MB", num_part_check = "1" -> Error("Invalid numeric value '-1' in size string '-1MB'") - This matches!
-
-    # Regex to extract POSITIVE numeric part and optional unit (now that negative is handled)
-    match = re.match(r'^(\d+(\.\d+)?)\s*([KMGT]?B?)$', size_str)
+    # One match splits sign, number and unit prefix (a bare number means bytes)
+    match = _SIZE_RE.match(size_str)
     if not match:
-        # Fallback for plain numbers (assume bytes)
-        if re.match(r'^\d+(\.\d+)?$', size_str):
-            num_part = size_str
-            unit = 'B' # Assume bytes if no unit
-        else:
-            # Restore the original general error message for formats not caught by specific checks.
-            raise ValueError(f"Invalid size format: '{original_input_for_error}'. Use formats like 100, 100KB, 50.5MB, 1GB.")
-    else:
-        num_part = match.group(1)
-        unit = match.group(3) if match.group(3) else 'B' # Default to Bytes if unit is missing
+        raise ValueError(f"Invalid size format: '{original_input_for_error}'. Use formats like 100, 100KB, 50.5MB, 1GB.")
+    sign, num_part, unit_prefix = match.groups()
+    if sign:
+        # Negative sizes are matched (rather than rejected as a bad format) to name the bad number
+        raise ValueError(f"Invalid numeric value '-{num_part}' in size string '{original_input_for_error}'")
 
-    try:
-        val = float(num_part)
-    except ValueError:
-        # This should technically not happen due to regex, but as a safeguard
-        raise ValueError(f"Could not parse numeric value from '{num_part}' in '{original_input_for_error}'")
-
-    if val < 0:
-        raise ValueError("Size cannot be negative.")
-
-    multipliers = {
-        'B': 1,
-        'KB': 1024,
-        'MB': 1024**2,
-        'GB': 1024**3,
-        'TB': 1024**4
-    }
-
-    # Adjust unit if only K, M, G, T is provided
-    if unit in ('K', 'M', 'G', 'T'):
-        unit += 'B'
-
-    if unit not in multipliers:
-        # Should not happen if regex is correct, but good to have
-        raise ValueError(f"Unknown size unit '{unit}' in '{original_input_for_error}'. Use B, KB, MB, GB, TB.")
-
-    return int(val * multipliers[unit])
+    return int(float(num_part) * _SIZE_MULTIPLIERS[unit_prefix])
 
 
 def sanitize_filename(filename):
@@ -115,27 +85,28 @@ def sanitize_filename(filename):
     # New regex: Only remove known problematic chars, control chars, and whitespace.
     # Allows unicode letters like 'é' to pass through.
     # Added \s to handle spaces correctly as per test_sanitize_spaces and collapsing sequences like ' / '.
-    sanitized = re.sub(r'[<>:"/\\|?*\x00-\x1F\s]+', '_', filename)
+    # (compiled once at module level as _FILENAME_UNSAFE_RE)
+    sanitized = _FILENAME_UNSAFE_RE.sub('_', filename)
 
     # 3. Strip leading/trailing underscores AFTER replacement
     sanitized = sanitized.strip('_')
 
     # 4. Limit length to 100 bytes (as per test_sanitize_long_filename_truncation)
     max_bytes = 100
-    if len(sanitized.encode('utf-8')) > max_bytes:
-        # Truncate carefully to respect multi-byte character boundaries
-        truncated = ''
-        current_bytes = 0
-        for char in sanitized:
-            char_bytes = len(char.encode('utf-8'))
-            if current_bytes + char_bytes <= max_bytes:
-                truncated += char
-                current_bytes += char_bytes
-            else:
-                break
-        sanitized = truncated
-        # Re-strip underscores in case truncation created trailing ones
-        sanitized = sanitized.strip('_')
+    # A UTF-8 character is at most 4 bytes, so short names can skip the encode
+    if len(sanitized) * 4 > max_bytes:
+        if sanitized.isascii():
+            # ASCII is one byte per character: measure and cut without encoding
+            if len(sanitized) > max_bytes:
+                sanitized = sanitized[:max_bytes].strip('_')
+        else:
+            encoded = sanitized.encode('utf-8')
+            if len(encoded) > max_bytes:
+                # Truncate carefully to respect multi-byte character boundaries: cut the
+                # bytes, then drop the partial character the cut may leave at the end
+                sanitized = encoded[:max_bytes].decode('utf-8', 'ignore')
+                # Re-strip underscores in case truncation created trailing ones
+                sanitized = sanitized.strip('_')
 
     # 5. Handle empty result (as per test_sanitize_empty_result)
     # Check *after* potential truncation and final stripping
@@ -145,6 +116,55 @@ def sanitize_filename(filename):
 
     return sanitized
 
+def is_jsonl_input(input_file):
+    """Returns True if the input file is JSON Lines, judging by its extension."""
+    return os.path.splitext(str(input_file))[1].lower() in JSONL_INPUT_EXTENSIONS
+
+def default_filename_format(split_type):
+    """Returns the default filename format for a split type ('key', or 'count'/'size'/'chunk')."""
+    return DEFAULT_KEY_FILENAME_FORMAT if split_type == 'key' else DEFAULT_CHUNK_FILENAME_FORMAT
+
+def compile_filename_format(filename_format, **constants):
+    """Compiles a --filename-format template once for repeated rendering.
+
+    Placeholders whose values are fixed for the whole run (usually
+    ``base_name``, ``type`` and ``ext``) are passed as keyword arguments and
+    baked into the template here. Only ``index`` and ``part`` are left to fill
+    in per file, so rendering skips re-parsing the template and building a
+    kwargs dict for every output file.
+
+    Returns:
+        callable: ``render(index, part)`` returning the formatted basename.
+
+    Raises:
+        ValueError: If the template uses an unknown, positional or nested
+            placeholder, or a format spec that does not fit a constant value.
+            Format specs applied to ``index``/``part`` are only checked when
+            rendering (also raising ValueError).
+    """
+    formatter = string.Formatter()
+    template = []
+    for literal, field_name, format_spec, conversion in formatter.parse(filename_format):
+        template.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field_name is None:
+            continue
+        if field_name not in FILENAME_FORMAT_FIELDS:
+            raise ValueError(f"Unknown placeholder '{{{field_name}}}' in filename format. "
+                             f"Valid placeholders: {', '.join('{' + f + '}' for f in FILENAME_FORMAT_FIELDS)}")
+        if '{' in format_spec:
+            raise ValueError(f"Nested placeholders are not supported in filename format ('{{{field_name}:{format_spec}}}').")
+        if field_name in constants:
+            value = formatter.format_field(formatter.convert_field(constants[field_name], conversion), format_spec)
+            template.append(value.replace('{', '{{').replace('}', '}}'))
+        elif field_name in ('index', 'part'):
+            position = 0 if field_name == 'index' else 1
+            conversion_str = f"!{conversion}" if conversion else ""
+            spec_str = f":{format_spec}" if format_spec else ""
+            template.append(f"{{{position}{conversion_str}{spec_str}}}")
+        else:
+            raise ValueError(f"No value provided for placeholder '{{{field_name}}}' in filename format.")
+    return ''.join(template).format
+
 # --- Progress Tracking --- # <-- Added Section Header
 class ProgressTracker:
     """Tracks and reports progress of processing operations."""
@@ -155,19 +175,26 @@ class ProgressTracker:
 
         Args:
             logger: The logging instance to use for reporting.
-            report_interval (int): Report progress every N items.
+            report_interval (int): Report progress every N items (0 or less disables reporting).
         """
         self.total_items = 0
         self.last_reported_item_count = 0 # Track items at last report
         self.start_time = time.time()
         self.report_interval = report_interval
+        # Items left until the next report. A disabled interval starts at 0 and only
+        # goes negative, so it never reaches zero.
+        self._countdown = max(report_interval, 0)
         self.log = logger # Store the logger instance
 
     def update(self, current_total_items):
-        """Update progress and report if interval reached."""
+        """Update progress and report if interval reached.
+
+        Called once per processed item; counts down instead of comparing totals each time.
+        """
         self.total_items = current_total_items # Update total count
-        # Report if the number of *new* items since last report meets/exceeds interval
-        if (self.total_items - self.last_reported_item_count) >= self.report_interval:
+        self._countdown -= 1
+        if not self._countdown:
+            self._countdown = self.report_interval
             elapsed = time.time() - self.start_time
             # Calculate rate based on total items over total time
             rate = self.total_items / elapsed if elapsed > 0 else 0
@@ -6,7 +6,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Adjust the import based on your actual structure if needed
-from src.utils import parse_size, sanitize_filename
+from src.utils import parse_size, sanitize_filename, compile_filename_format, default_filename_format, ProgressTracker
 
 # Tests for parse_size
 def test_parse_size_bytes():
@@ -117,4 +117,53 @@ def test_sanitize_numbers():
 def test_sanitize_none():
     # Assuming we want 'None' to become "__empty__" or a specific string
     # Let's align with the implementation detail (it becomes 'None' string first)
-    assert sanitize_filename(None) == "None" 
\ No newline at end of file
+    assert sanitize_filename(None) == "None" 
+
+# Tests for compile_filename_format
+def test_compile_filename_format_defaults():
+    render = compile_filename_format("{base_name}_{type}_{index:04d}{part}.{ext}", base_name="chunk", type="chunk", ext="json")
+    assert render(3, "") == "chunk_chunk_0003.json"
+    assert render(12, "_part_0001") == "chunk_chunk_0012_part_0001.json"
+    render = compile_filename_format("{base_name}_key_{index}{part}.{ext}", base_name="data", type="key", ext="jsonl")
+    assert render("A", "") == "data_key_A.jsonl"
+
+def test_compile_filename_format_escapes_braces():
+    render = compile_filename_format("{{x}}_{base_name}_{index}.{ext}", base_name="a{b}", type="key", ext="jsonl")
+    assert render("k", "") == "{x}_a{b}_k.jsonl"
+
+def test_compile_filename_format_invalid_placeholder():
+    with pytest.raises(ValueError, match=r"Unknown placeholder '\{prefix\}'"):
+        compile_filename_format("{prefix}_{index}.{ext}", base_name="a", type="key", ext="jsonl")
+    with pytest.raises(ValueError, match="Unknown placeholder"):
+        compile_filename_format("{}_{index}.{ext}", base_name="a", type="key", ext="jsonl")
+
+def test_default_filename_format():
+    assert default_filename_format('key') == "{base_name}_key_{index}{part}.{ext}"
+    assert default_filename_format('count') == "{base_name}_{type}_{index:04d}{part}.{ext}"
+    assert default_filename_format('size') == default_filename_format('chunk') == default_filename_format('count')
+
+# Tests for ProgressTracker
+class _RecordingLogger:
+    def __init__(self):
+        self.messages = []
+    def info(self, msg):
+        self.messages.append(msg)
+
+def test_progress_tracker_reports_every_interval():
+    logger = _RecordingLogger()
+    tracker = ProgressTracker(logger, report_interval=3)
+    for n in range(1, 8):
+        tracker.update(n)
+    assert len(logger.messages) == 2
+    assert "Processed 3 items" in logger.messages[0]
+    assert "Processed 6 items" in logger.messages[1]
+    assert tracker.total_items == 7
+
+def test_progress_tracker_zero_interval_disables():
+    logger = _RecordingLogger()
+    tracker = ProgressTracker(logger, report_interval=0)
+    for n in range(1, 100):
+        tracker.update(n)
+    assert logger.messages == []
+    tracker.finalize()
+    assert len(logger.messages) == 1 and "Complete: Processed 99 items" in logger.messages[0]
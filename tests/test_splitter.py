@@ -150,6 +150,101 @@ def test_split_by_count_jsonl(temp_output_dir):
     assert len(data3) == 1
     assert data3[0]["id"] == 7
 
+def test_split_by_count_filename_format(temp_output_dir):
+    """Test count split file names follow --filename-format, and an invalid format falls back."""
+    output_dir = temp_output_dir
+    run_splitter([
+        str(SAMPLE_ARRAY_FILE),
+        "--output-dir", str(output_dir),
+        "--base-name", "fmt",
+        "--split-by", "count",
+        "--value", "3",
+        "--path", "item",
+        "--filename-format", "{base_name}-{index:03d}{part}-{type}.{ext}"
+    ])
+    assert sorted(os.listdir(output_dir)) == ["fmt-000-chunk.json", "fmt-001-chunk.json", "fmt-002-chunk.json"]
+
+    fallback_dir = os.path.join(output_dir, "fallback")
+    run_splitter([
+        str(SAMPLE_ARRAY_FILE),
+        "--output-dir", fallback_dir,
+        "--base-name", "fmt",
+        "--split-by", "count",
+        "--value", "3",
+        "--path", "item",
+        "--filename-format", "{base_name}_{prefix}_{index:04d}.{ext}"
+    ])
+    assert sorted(os.listdir(fallback_dir)) == ["fmt_chunk_0000.json", "fmt_chunk_0001.json", "fmt_chunk_0002.json"]
+
+def test_split_jsonl_input_by_count(temp_output_dir):
+    """Test that JSON Lines input is split by count without --path, copying lines as they are."""
+    output_dir = temp_output_dir
+    base_name = "jsonl_count"
+    run_splitter([
+        str(SAMPLE_JSONL_FILE), # 7 lines
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "count",
+        "--value", "3",
+        "--output-format", "jsonl"
+    ])
+
+    files = sorted(glob.glob(os.path.join(output_dir, f"{base_name}_chunk_*.jsonl")))
+    assert len(files) == 3
+    assert [count_lines(f) for f in files] == [3, 3, 1]
+    with open(SAMPLE_JSONL_FILE, 'rb') as f:
+        original = f.read()
+    assert b"".join(Path(f).read_bytes() for f in files) == original
+
+def test_split_jsonl_input_by_size(temp_output_dir):
+    """Test that JSON Lines input is split by size on raw line lengths, copying lines as they are."""
+    output_dir = temp_output_dir
+    base_name = "jsonl_size"
+    run_splitter([
+        str(SAMPLE_JSONL_FILE), # 7 lines of 40 bytes each, newline included
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "size",
+        "--value", "100B",
+        "--output-format", "jsonl"
+    ])
+
+    files = sorted(glob.glob(os.path.join(output_dir, f"{base_name}_chunk_*.jsonl")))
+    assert [count_lines(f) for f in files] == [2, 2, 2, 1]
+    assert all(os.path.getsize(f) <= 100 for f in files)
+    assert b"".join(Path(f).read_bytes() for f in files) == SAMPLE_JSONL_FILE.read_bytes()
+
+def test_split_jsonl_input_drops_blank_lines(temp_output_dir, tmp_path):
+    """Test that lines holding only whitespace are dropped anywhere in the input, not copied."""
+    input_file = tmp_path / "gaps.jsonl"
+    input_file.write_bytes(b'\n{"id":1}\n\n{"id":2}\n \t\n{"id":3}\n{"id":4}\n\n')
+    for split_args in (["--split-by", "count", "--value", "3"], ["--split-by", "size", "--value", "30B"]):
+        output_dir = temp_output_dir / split_args[1]
+        run_splitter([
+            str(input_file),
+            "--output-dir", str(output_dir),
+            "--output-format", "jsonl",
+        ] + split_args)
+        files = sorted(output_dir.iterdir())
+        assert b"".join(f.read_bytes() for f in files) == b'{"id":1}\n{"id":2}\n{"id":3}\n{"id":4}\n'
+        assert [count_lines(f) for f in files] == [3, 1]
+
+def test_split_jsonl_input_by_key(temp_output_dir):
+    """Test that JSON Lines input is parsed line by line for key splitting."""
+    output_dir = temp_output_dir
+    base_name = "jsonl_key"
+    run_splitter([
+        str(SAMPLE_JSONL_FILE),
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "key",
+        "--value", "category",
+    ])
+
+    assert [item['id'] for item in load_jsonl_output(output_dir / f"{base_name}_key_A.jsonl")] == [1, 3, 6, 7]
+    assert [item['id'] for item in load_jsonl_output(output_dir / f"{base_name}_key_B.jsonl")] == [2, 5]
+    assert [item['id'] for item in load_jsonl_output(output_dir / f"{base_name}_key_C.jsonl")] == [4]
+
 @pytest.mark.skip(reason="Requires a large sample JSON file which is not present")
 def test_split_by_size_basic(temp_output_dir):
     """Test splitting by size into JSON array files using a larger file."""
@@ -278,6 +373,139 @@ def test_split_by_key_basic(temp_output_dir):
     with open(file_c, 'r') as f:
         assert len(f.readlines()) == 1, f"Expected 1 item in {file_c}"
 
+def test_split_by_key_rerun_overwrites(temp_output_dir):
+    """Test that re-running a key split replaces existing output instead of appending to it."""
+    output_dir = temp_output_dir
+    base_name = "key_rerun"
+    args = [
+        str(SAMPLE_ARRAY_FILE),
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "key",
+        "--value", "category",
+        "--path", "item",
+    ]
+    run_splitter(args)
+    run_splitter(args)
+
+    assert count_lines(output_dir / f"{base_name}_key_A.jsonl") == 4
+    assert count_lines(output_dir / f"{base_name}_key_B.jsonl") == 2
+    assert count_lines(output_dir / f"{base_name}_key_C.jsonl") == 1
+
+def test_split_by_key_max_open_files(temp_output_dir):
+    """Test that --max-open-files bounds the handle pool without losing items."""
+    output_dir = temp_output_dir
+    base_name = "key_max_open"
+    result = run_splitter([
+        str(SAMPLE_ARRAY_FILE),
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "key",
+        "--value", "category",
+        "--path", "item",
+        "--max-open-files", "1",
+    ])
+    assert "Maximum open files: 1" in result.stderr
+
+    assert [item["id"] for item in load_jsonl_output(output_dir / f"{base_name}_key_A.jsonl")] == [1, 3, 6, 7]
+    assert [item["id"] for item in load_jsonl_output(output_dir / f"{base_name}_key_B.jsonl")] == [2, 5]
+    assert [item["id"] for item in load_jsonl_output(output_dir / f"{base_name}_key_C.jsonl")] == [4]
+
+def test_split_by_key_non_integer_numbers(temp_output_dir, tmp_path):
+    """Test that items with non-integer numbers (parsed as Decimal) are written, not skipped."""
+    input_file = tmp_path / "floats.json"
+    input_file.write_text('[{"category": "A", "price": 1.25}, {"category": "A", "price": 3}]', encoding='utf-8')
+    output_dir = temp_output_dir
+    base_name = "key_floats"
+    run_splitter([
+        str(input_file),
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "key",
+        "--value", "category",
+        "--path", "item",
+    ])
+
+    data = load_jsonl_output(output_dir / f"{base_name}_key_A.jsonl")
+    assert data == [{"category": "A", "price": 1.25}, {"category": "A", "price": 3}]
+
+def test_split_by_key_equal_values_of_different_types(temp_output_dir, tmp_path):
+    """Test that key values which compare equal but print differently get separate files."""
+    input_file = tmp_path / "mixed_keys.json"
+    input_file.write_text('[{"k": "1", "id": 1}, {"k": 1, "id": 2}, {"k": 1.0, "id": 3}, '
+                          '{"k": 1.00, "id": 4}, {"k": true, "id": 5}, {"k": "1", "id": 6}]', encoding='utf-8')
+    output_dir = temp_output_dir
+    base_name = "key_mixed"
+    run_splitter([
+        str(input_file),
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "key",
+        "--value", "k",
+        "--path", "item",
+    ])
+
+    ids = {name: [item["id"] for item in load_jsonl_output(output_dir / name)] for name in os.listdir(output_dir)}
+    assert ids == {
+        f"{base_name}_key_1.jsonl": [1, 2, 6],
+        f"{base_name}_key_1.0.jsonl": [3],
+        f"{base_name}_key_1.00.jsonl": [4],
+        f"{base_name}_key_True.jsonl": [5],
+    }
+
+def test_split_by_key_bounds_total_buffered_bytes(temp_output_dir, tmp_path, monkeypatch):
+    """Test that buffers across many keys are written out once their total passes the budget."""
+    from src import splitters
+    budget = 4096
+    monkeypatch.setattr(splitters, "KEY_WRITE_BUFFER_TOTAL", budget)
+    items = [{"id": i, "k": f"key{i % 200}", "pad": "x" * 50} for i in range(1000)]
+    input_file = tmp_path / "many_keys.json"
+    input_file.write_text(json.dumps(items), encoding='utf-8')
+
+    peaks = []
+    flush_largest = splitters.KeySplitter._flush_largest_key_buffers
+    def recording_flush_largest(self, target_bytes, handle_pool, file_stats):
+        # Called as soon as the total passes the budget, so this is the peak
+        assert self._key_buffered_bytes == sum(len(state['buf']) for state in file_stats.values())
+        peaks.append(self._key_buffered_bytes)
+        return flush_largest(self, target_bytes, handle_pool, file_stats)
+    monkeypatch.setattr(splitters.KeySplitter, "_flush_largest_key_buffers", recording_flush_largest)
+
+    splitter = splitters.KeySplitter(
+        key_name="k", input_file=str(input_file), output_dir=str(temp_output_dir),
+        base_name="budget", path="item", output_format="jsonl", created_files_set=set())
+    assert splitter.split()
+
+    max_line = max(len(json.dumps(item, separators=(',', ':'))) + 1 for item in items)
+    assert peaks # 200 keys never fill a 256 KiB block, so only the budget flushes them early
+    assert max(peaks) <= budget + max_line
+    assert splitter._key_buffered_bytes == 0
+    written = [item for name in os.listdir(temp_output_dir) for item in load_jsonl_output(temp_output_dir / name)]
+    assert len(os.listdir(temp_output_dir)) == 200
+    assert sorted(item["id"] for item in written) == list(range(1000))
+
+def test_split_by_key_keys_sharing_a_file_keep_all_items(temp_output_dir, tmp_path, monkeypatch):
+    """Test that keys whose paths name the same file (as on a case-insensitive filesystem) append, not truncate."""
+    from src import splitters
+    input_file = tmp_path / "case_keys.json"
+    input_file.write_text('[{"k": "US", "id": 1}, {"k": "us", "id": 2}, {"k": "US", "id": 3}]', encoding='utf-8')
+    # The two keys get differently spelled paths that lead to the same file
+    def shared_file_path(self, sanitized_key, part_index, state):
+        if sanitized_key == "US":
+            return os.path.join(self.output_dir, "us.jsonl")
+        return os.path.join(self.output_dir, "..", temp_output_dir.name, "us.jsonl")
+    monkeypatch.setattr(splitters.KeySplitter, "_key_file_path", shared_file_path)
+
+    created_files = set()
+    splitter = splitters.KeySplitter(
+        key_name="k", input_file=str(input_file), output_dir=str(temp_output_dir),
+        base_name="case", path="item", output_format="jsonl", created_files_set=created_files)
+    assert splitter.split()
+
+    assert len(created_files) == 2
+    assert os.listdir(temp_output_dir) == ["us.jsonl"]
+    assert sorted(item["id"] for item in load_jsonl_output(temp_output_dir / "us.jsonl")) == [1, 2, 3]
+
 def test_split_by_key_missing_group(temp_output_dir):
     """Test splitting by key with missing keys grouped (default)."""
     output_dir = temp_output_dir
@@ -513,6 +741,68 @@ def test_split_count_with_max_size(temp_output_dir):
     data1 = load_jsonl_output(chunk1)
     assert {item['id'] for item in data1} == {6, 7} # Items after the primary split point
 
+def test_split_count_with_max_size_keeps_all_items(temp_output_dir):
+    """Test that size-triggered parts neither drop nor duplicate items around a carry-over."""
+    output_dir = temp_output_dir
+    base_name = "count_carry"
+    run_splitter([
+        str(SAMPLE_ARRAY_FILE), # 7 items, 34 bytes each when compact
+        "--output-dir", str(output_dir),
+        "--base-name", base_name,
+        "--split-by", "count",
+        "--value", "5",
+        "--path", "item",
+        "--max-size", "150B",
+        "--output-format", "jsonl"
+    ])
+
+    # Items 1-4 fit in 150 bytes; item 5 is carried into its own part and closes chunk 0
+    chunk0 = load_jsonl_output(output_dir / f"{base_name}_chunk_0000.jsonl")
+    chunk0_part1 = load_jsonl_output(output_dir / f"{base_name}_chunk_0000_part_0001.jsonl")
+    chunk1 = load_jsonl_output(output_dir / f"{base_name}_chunk_0001.jsonl")
+    assert [item['id'] for item in chunk0] == [1, 2, 3, 4]
+    assert [item['id'] for item in chunk0_part1] == [5]
+    assert [item['id'] for item in chunk1] == [6, 7]
+    for path in output_dir.iterdir():
+        assert path.stat().st_size <= 150
+
+def test_split_keeps_integers_wider_than_64_bits(temp_output_dir, tmp_path):
+    """Test that integers beyond the 64-bit range are written exactly, not skipped."""
+    input_file = tmp_path / "big_ints.json"
+    input_file.write_text('[{"id": 1, "k": "a", "n": 123456789012345678901234}, '
+                          '{"id": 2, "k": "a", "n": -98765432109876543210}]', encoding='utf-8')
+    for split_args in (["--split-by", "count", "--value", "5"], ["--split-by", "key", "--value", "k"]):
+        output_dir = temp_output_dir / split_args[1]
+        run_splitter([
+            str(input_file),
+            "--output-dir", str(output_dir),
+            "--path", "item",
+            "--output-format", "jsonl",
+        ] + split_args)
+        (output_file,) = output_dir.iterdir()
+        items = load_jsonl_output(output_file)
+        assert [item['n'] for item in items] == [123456789012345678901234, -98765432109876543210]
+
+def test_split_reports_numbers_outside_float_range(temp_output_dir, tmp_path):
+    """Test that numbers a float cannot hold (overflow or underflow) are reported and skipped, not rewritten."""
+    input_file = tmp_path / "huge_number.json"
+    input_file.write_text('[{"id": 1, "v": 1.5}, {"id": 2, "v": 2.5e400}, {"id": 3, "v": -2.5}, '
+                          '{"id": 4, "v": 1e-400}, {"id": 5, "v": 0.0}, {"id": 6, "v": -0e5}]', encoding='utf-8')
+    output_dir = temp_output_dir
+    result = run_splitter([
+        str(input_file),
+        "--output-dir", str(output_dir),
+        "--split-by", "count",
+        "--value", "5",
+        "--path", "item",
+        "--output-format", "jsonl",
+    ])
+    assert "Could not serialize item 2" in result.stderr
+    assert "Could not serialize item 4" in result.stderr # Would otherwise be written as 0.0
+    (output_file,) = output_dir.iterdir()
+    assert "null" not in output_file.read_text(encoding='utf-8')
+    assert [item['id'] for item in load_jsonl_output(output_file)] == [1, 3, 5, 6]
+
 def test_split_count_with_max_records(temp_output_dir):
     """Test count splitting where max_records overrides the primary count."""
     output_dir = temp_output_dir